@@ -15,8 +15,17 @@ short_description: HttpApi Plugin for VMware REST API
 description:
   - This HttpApi plugin provides methods to connect to VMware vCenter over a HTTP(S)-based APIs.
 version_added: "2.10"
+options:
+  compression:
+    type: bool
+    description:
+      - Ask vCenter to compress the responses with gzip.
+    default: yes
+    vars:
+      - name: ansible_vmware_compression
 """
 
+import gzip
 import json
 
 from ansible.module_utils.basic import to_text
@@ -26,6 +35,7 @@ from ansible.plugins.httpapi import HttpApiBase
 from ansible.module_utils.connection import ConnectionError
 
 BASE_HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+GZIP_MAGIC = b"\x1f\x8b"
 
 
 class HttpApi(HttpApiBase):
@@ -69,8 +79,11 @@ class HttpApi(HttpApiBase):
 
         try:
             self._display_request(method=method)
+            headers = dict(BASE_HEADERS)
+            if self.get_option("compression"):
+                headers["Accept-Encoding"] = "gzip"
             response, response_data = self.connection.send(
-                path, data, method=method, headers=BASE_HEADERS, force_basic_auth=True
+                path, data, method=method, headers=headers, force_basic_auth=True
             )
 
             response_value = self._get_response_value(response_data)
@@ -79,7 +92,10 @@ class HttpApi(HttpApiBase):
         except AnsibleConnectionFailure as e:
             return 404, "Object not found"
         except HTTPError as e:
-            return e.code, json.loads(e.read())
+            body = e.read()
+            if body.startswith(GZIP_MAGIC):
+                body = gzip.decompress(body)
+            return e.code, json.loads(body)
 
     def _display_request(self, method="POST"):
         self.connection.queue_message(
@@ -87,7 +103,11 @@ class HttpApi(HttpApiBase):
         )
 
     def _get_response_value(self, response_data):
-        return to_text(response_data.getvalue())
+        value = response_data.getvalue()
+        # The recent versions of ansible-core already decompress the body
+        if value.startswith(GZIP_MAGIC):
+            value = gzip.decompress(value)
+        return to_text(value)
 
     def _response_to_json(self, response_text):
         try:
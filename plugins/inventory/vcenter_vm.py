@@ -0,0 +1,412 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+name: vcenter_vm
+plugin_type: inventory
+short_description: vCenter virtual machines inventory source
+description:
+- Get the virtual machines of a vCenter through the REST API.
+- The virtual machines are grouped by power state, cluster, folder and tag.
+- The guest identity and the network interfaces of the running virtual machines
+  are collected concurrently, up to C(vcenter_concurrency) requests at a time.
+- vCenter does not list more than 4000 virtual machines in one call, above
+  this the virtual machines are listed by datacenter, then by host.
+- Uses a YAML configuration file that ends with C(vcenter_vm.yml) or C(vcenter_vm.yaml).
+- Enable the inventory cache to skip the vCenter calls until C(cache_timeout) expires.
+extends_documentation_fragment:
+- constructed
+- inventory_cache
+options:
+  plugin:
+    description: Token that ensures this is a source file for the plugin.
+    required: true
+    choices:
+    - vmware.vmware_rest.vcenter_vm
+  vcenter_hostname:
+    description:
+    - The hostname or IP address of the vSphere vCenter.
+    type: str
+    env:
+    - name: VMWARE_HOST
+  vcenter_username:
+    description:
+    - The vSphere vCenter username.
+    type: str
+    env:
+    - name: VMWARE_USER
+  vcenter_password:
+    description:
+    - The vSphere vCenter password.
+    type: str
+    env:
+    - name: VMWARE_PASSWORD
+  vcenter_validate_certs:
+    description:
+    - Whether to validate the SSL certificate of the vCenter.
+    type: bool
+    default: true
+    env:
+    - name: VMWARE_VALIDATE_CERTS
+  vcenter_session_cache:
+    description:
+    - Reuse the vCenter session of the previous runs, like the modules do.
+    type: bool
+    default: false
+    env:
+    - name: VMWARE_SESSION_CACHE
+  vcenter_concurrency:
+    description:
+    - Maximum number of requests sent to the vCenter in parallel.
+    type: int
+    env:
+    - name: VMWARE_CONCURRENCY
+  filters:
+    description:
+    - The C(filter.*) parameters of vcenter_vm_info, to only get some of the
+      virtual machines.
+    - 'For instance C({"filter.power_states": ["POWERED_ON"]}).'
+    type: dict
+    default: {}
+  group_by:
+    description:
+    - The attributes used to create the groups.
+    - The group names are prefixed with the attribute, e.g. C(power_state_powered_on)
+      or C(tag_production).
+    - The C(cluster), C(folder) and C(tag) attributes are also set as host variables.
+    type: list
+    elements: str
+    choices:
+    - cluster
+    - folder
+    - power_state
+    - tag
+    default:
+    - cluster
+    - folder
+    - power_state
+    - tag
+  hostnames:
+    description:
+    - The attribute used as the inventory hostname, the name of the virtual machine
+      or its identifier (moref, e.g. C(vm-42)).
+    - With C(name), the virtual machines that share a name get their identifier
+      as suffix, e.g. C(web_vm-42) and C(web_vm-43), so they do not overwrite the
+      host variables of each other.
+    - The name of the virtual machine is set as C(vm_name), its identifier as C(vm).
+    type: str
+    choices:
+    - name
+    - vm
+    default: name
+  guest_info:
+    description:
+    - Collect the guest identity and the network interfaces of the running virtual
+      machines. Their IP address is used as C(ansible_host).
+    - This costs two requests per running virtual machine.
+    type: bool
+    default: true
+author:
+- Ansible VMware team
+version_added: 1.0.0
+requirements:
+- python >= 3.6
+- aiohttp
+"""
+
+EXAMPLES = r"""
+# vcenter_vm.yml
+plugin: vmware.vmware_rest.vcenter_vm
+vcenter_hostname: vcenter.test
+vcenter_username: administrator@vsphere.local
+vcenter_password: secret
+filters:
+  filter.power_states:
+  - POWERED_ON
+cache: true
+cache_plugin: jsonfile
+cache_connection: ~/.ansible/inventory_cache
+cache_timeout: 3600
+"""
+
+import asyncio
+import collections
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+try:
+    from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+        fan_out,
+        gen_args,
+        open_session,
+    )
+except ImportError as e:
+    IMPORT_ERROR = e
+else:
+    IMPORT_ERROR = None
+
+
+VM_URL = "https://{vcenter_hostname}/rest/vcenter/vm"
+# vCenter refuses to list more than 4000 virtual machines at once, the list
+# is then split by datacenter, then by host. The filters of each level also
+# narrow the list of the next one.
+TOO_MANY_VMS = "com.vmware.vapi.std.errors.unable_to_allocate_resource"
+PARTITIONS = [
+    ("datacenter", []),
+    ("host", ["filter.datacenters", "filter.clusters", "filter.folders"]),
+]
+TAG_ASSOCIATION_URL = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=list-attached-tags-on-objects"
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = "vmware.vmware_rest.vcenter_vm"
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(("vcenter_vm.yml", "vcenter_vm.yaml"))
+        return False
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache=cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option("cache") and cache
+        update_cache = self.get_option("cache") and not cache
+        vms = None
+        if use_cache:
+            try:
+                vms = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+        if vms is None:
+            vms = self._fetch()
+        if update_cache:
+            self._cache[cache_key] = vms
+        self._populate(vms)
+
+    def _fetch(self):
+        if IMPORT_ERROR:
+            raise AnsibleParserError(
+                "vcenter_vm inventory requires aiohttp: {}".format(IMPORT_ERROR)
+            )
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self._get_vms())
+        except Exception as e:
+            raise AnsibleParserError(
+                "Failed to get the virtual machines from the vCenter: {}".format(e)
+            )
+        finally:
+            loop.close()
+
+    async def _get_vms(self):
+        params = {
+            "vcenter_hostname": self.get_option("vcenter_hostname"),
+            "vcenter_concurrency": self.get_option("vcenter_concurrency"),
+        }
+        session = await open_session(
+            vcenter_hostname=params["vcenter_hostname"],
+            vcenter_username=self.get_option("vcenter_username"),
+            vcenter_password=self.get_option("vcenter_password"),
+            validate_certs=self.get_option("vcenter_validate_certs"),
+            session_cache=self.get_option("vcenter_session_cache"),
+        )
+        try:
+            return await VMCollector(session, params, self.get_option).collect()
+        finally:
+            await session.close()
+            # The session is bound to the event loop of this run
+            open_session.cache_clear()
+
+    def _hostnames(self, vms):
+        """Map each virtual machine to a unique inventory hostname."""
+        if self.get_option("hostnames") == "vm":
+            return {vm["vm"]: vm["vm"] for vm in vms}
+        names = collections.Counter(vm["name"] for vm in vms)
+        return {
+            vm["vm"]: vm["name"]
+            if names[vm["name"]] == 1
+            else "{}_{}".format(vm["name"], vm["vm"])
+            for vm in vms
+        }
+
+    def _populate(self, vms):
+        strict = self.get_option("strict")
+        group_by = self.get_option("group_by")
+        hostnames = self._hostnames(vms)
+        for vm in vms:
+            host = hostnames[vm["vm"]]
+            self.inventory.add_host(host)
+            for key, value in vm.items():
+                # name is a reserved variable, it is the inventory_hostname
+                if key != "name":
+                    self.inventory.set_variable(host, key, value)
+            self.inventory.set_variable(host, "vm_name", vm["name"])
+            ip_address = (vm.get("guest_identity") or {}).get("ip_address")
+            if ip_address:
+                self.inventory.set_variable(host, "ansible_host", ip_address)
+
+            for attribute in group_by:
+                values = vm.get(attribute)
+                if attribute == "power_state":
+                    values = values.lower()
+                if not isinstance(values, list):
+                    values = [values] if values else []
+                for value in values:
+                    group = self.inventory.add_group(
+                        self._sanitize_group_name("{}_{}".format(attribute, value))
+                    )
+                    self.inventory.add_child(group, host)
+
+            hostvars = self.inventory.get_host(host).get_vars()
+            self._set_composite_vars(
+                self.get_option("compose"), hostvars, host, strict=strict
+            )
+            self._add_host_to_composed_groups(
+                self.get_option("groups"), hostvars, host, strict=strict
+            )
+            self._add_host_to_keyed_groups(
+                self.get_option("keyed_groups"), hostvars, host, strict=strict
+            )
+
+
+class VMCollector(object):
+    """Get the virtual machines and what the inventory needs about them."""
+
+    def __init__(self, session, params, get_option):
+        self.session = session
+        self.params = params
+        self.get_option = get_option
+        self.semaphore = asyncio.Semaphore(
+            fan_out(session, params["vcenter_concurrency"])
+        )
+
+    async def get(self, _url, default=None):
+        async with self.semaphore:
+            async with self.session.get(_url) as resp:
+                _json = await resp.json()
+                if resp.status != 200:
+                    if default is not None:
+                        return default
+                    raise AnsibleParserError(
+                        "GET {} returned {}: {}".format(_url, resp.status, _json)
+                    )
+                return _json["value"]
+
+    async def list_vms(self, filters=None):
+        query = dict(self.get_option("filters"), **(filters or {}))
+        return await self._list_vms(query, PARTITIONS)
+
+    async def _list_vms(self, query, partitions):
+        _url = VM_URL.format(**self.params) + gen_args(query, list(query))
+        async with self.semaphore:
+            async with self.session.get(_url) as resp:
+                _json = await resp.json()
+        if resp.status == 200:
+            return _json["value"]
+        if _json.get("type") != TOO_MANY_VMS or not partitions:
+            raise AnsibleParserError(
+                "GET {} returned {}: {}".format(_url, resp.status, _json)
+            )
+        (kind, parent_filters), partitions = partitions[0], partitions[1:]
+        key = "filter.{}s".format(kind)
+        parents = query.get(key)
+        if not parents:
+            parent_query = {i: query[i] for i in parent_filters if query.get(i)}
+            parents = [
+                i[kind]
+                for i in await self.get(
+                    "https://{vcenter_hostname}/rest/vcenter/{kind}".format(
+                        kind=kind, **self.params
+                    )
+                    + gen_args(parent_query, list(parent_query))
+                )
+            ]
+        elif not isinstance(parents, list):
+            parents = [parents]
+        parts = await asyncio.gather(
+            *[self._list_vms(dict(query, **{key: i}), partitions) for i in parents]
+        )
+        # The parts do not overlap, the merge by ID is a safety net
+        return list({vm["vm"]: vm for part in parts for vm in part}.values())
+
+    async def placement(self, kind):
+        """Map each virtual machine to the name of its cluster or folder."""
+        _url = "https://{vcenter_hostname}/rest/vcenter/{kind}".format(
+            kind=kind, **self.params
+        )
+        if kind == "folder":
+            _url += "?filter.type=VIRTUAL_MACHINE"
+        parents = await self.get(_url)
+        members = await asyncio.gather(
+            *[self.list_vms({"filter.{}s".format(kind): i[kind]}) for i in parents]
+        )
+        return {
+            vm["vm"]: parent["name"]
+            for parent, vms in zip(parents, members)
+            for vm in vms
+        }
+
+    async def tags(self, vms):
+        """Map each virtual machine to the names of its tags."""
+        async with self.semaphore:
+            async with self.session.post(
+                TAG_ASSOCIATION_URL.format(**self.params),
+                json={
+                    "object_ids": [
+                        {"id": i["vm"], "type": "VirtualMachine"} for i in vms
+                    ]
+                },
+            ) as resp:
+                _json = await resp.json()
+                if resp.status != 200:
+                    return {}
+        attached = {i["object_id"]["id"]: i["tag_ids"] for i in _json["value"]}
+        tag_ids = sorted({i for ids in attached.values() for i in ids})
+        tags = await asyncio.gather(
+            *[
+                self.get(
+                    "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag/id:{tag}".format(
+                        tag=i, **self.params
+                    ),
+                    default={},
+                )
+                for i in tag_ids
+            ]
+        )
+        names = {i: tag.get("name", i) for i, tag in zip(tag_ids, tags)}
+        return {vm: [names[i] for i in ids] for vm, ids in attached.items()}
+
+    async def guest(self, vm):
+        _url = VM_URL.format(**self.params) + "/{vm}/guest".format(vm=vm["vm"])
+        # The guest calls fail when the VMware Tools are not running
+        vm["guest_identity"], vm["guest_interfaces"] = await asyncio.gather(
+            self.get(_url + "/identity", default={}),
+            self.get(_url + "/networking/interfaces", default=[]),
+        )
+
+    async def collect(self):
+        group_by = self.get_option("group_by")
+        vms = await self.list_vms()
+        mappings = {}
+        if "cluster" in group_by:
+            mappings["cluster"] = self.placement("cluster")
+        if "folder" in group_by:
+            mappings["folder"] = self.placement("folder")
+        if "tag" in group_by and vms:
+            mappings["tag"] = self.tags(vms)
+        calls = list(mappings.values())
+        if self.get_option("guest_info"):
+            calls += [self.guest(i) for i in vms if i["power_state"] == "POWERED_ON"]
+        results = await asyncio.gather(*calls)
+        mappings = dict(zip(mappings, results))
+        for vm in vms:
+            for kind, mapping in mappings.items():
+                vm[kind] = mapping.get(vm["vm"])
+        return vms
@@ -0,0 +1,150 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+name: vcenter_id
+short_description: Get the ID of vCenter inventory objects from their name
+description:
+- Return the ID of the vCenter objects of the given C(type) with the given names.
+- All the object types are indexed with one concurrent sweep. The index is
+  kept on disk for 10 minutes and shared with the modules, so the following
+  lookups and tasks do not list the objects again.
+- A name that matches several objects is an error.
+options:
+  _terms:
+    description:
+    - The names of the objects. An existing ID is returned as is.
+    required: true
+  type:
+    description:
+    - The type of the objects.
+    type: str
+    required: true
+    choices:
+    - cluster
+    - datacenter
+    - datastore
+    - folder
+    - host
+    - network
+    - resource_pool
+  vcenter_hostname:
+    description:
+    - The hostname or IP address of the vSphere vCenter.
+    type: str
+    env:
+    - name: VMWARE_HOST
+  vcenter_username:
+    description:
+    - The vSphere vCenter username.
+    type: str
+    env:
+    - name: VMWARE_USER
+  vcenter_password:
+    description:
+    - The vSphere vCenter password.
+    type: str
+    env:
+    - name: VMWARE_PASSWORD
+  vcenter_validate_certs:
+    description:
+    - Whether to validate the SSL certificate of the vCenter.
+    type: bool
+    default: true
+    env:
+    - name: VMWARE_VALIDATE_CERTS
+  vcenter_session_cache:
+    description:
+    - Reuse the vCenter session of the previous runs, like the modules do.
+    type: bool
+    default: false
+    env:
+    - name: VMWARE_SESSION_CACHE
+author:
+- Ansible VMware team
+version_added: 1.0.0
+requirements:
+- python >= 3.6
+- aiohttp
+"""
+
+EXAMPLES = r"""
+- name: Create a VM in the my_folder folder of the my_cluster cluster
+  vmware.vmware_rest.vcenter_vm:
+    name: test_vm1
+    guest_OS: DEBIAN_8_64
+    placement:
+      cluster: "{{ lookup('vmware.vmware_rest.vcenter_id', 'my_cluster', type='cluster') }}"
+      folder: "{{ lookup('vmware.vmware_rest.vcenter_id', 'my_folder', type='folder') }}"
+"""
+
+RETURN = r"""
+_raw:
+  description: The IDs of the objects, in the order of the names.
+  type: list
+  elements: str
+"""
+
+import asyncio
+
+from ansible.errors import AnsibleError, AnsibleLookupError
+from ansible.plugins.lookup import LookupBase
+
+try:
+    from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+        open_session,
+    )
+    from ansible_collections.vmware.vmware_rest.plugins.module_utils.name_index import (
+        session_index,
+    )
+except ImportError as e:
+    IMPORT_ERROR = e
+else:
+    IMPORT_ERROR = None
+
+
+class LookupModule(LookupBase):
+    def run(self, terms, variables=None, **kwargs):
+        if IMPORT_ERROR:
+            raise AnsibleError(
+                "vcenter_id lookup requires aiohttp: {}".format(IMPORT_ERROR)
+            )
+        self.set_options(var_options=variables, direct=kwargs)
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self._resolve(terms))
+        finally:
+            loop.close()
+
+    async def _resolve(self, terms):
+        resource_type = self.get_option("type")
+        session = await open_session(
+            vcenter_hostname=self.get_option("vcenter_hostname"),
+            vcenter_username=self.get_option("vcenter_username"),
+            vcenter_password=self.get_option("vcenter_password"),
+            validate_certs=self.get_option("vcenter_validate_certs"),
+            session_cache=self.get_option("vcenter_session_cache"),
+        )
+        try:
+            result = []
+            for name in terms:
+                ids = await session_index(session).resolve(session, resource_type, name)
+                if not ids:
+                    raise AnsibleLookupError(
+                        "No {} object is named {}".format(resource_type, name)
+                    )
+                if len(ids) > 1:
+                    raise AnsibleLookupError(
+                        "Several {} objects are named {}: {}".format(
+                            resource_type, name, ", ".join(ids)
+                        )
+                    )
+                result.append(ids[0])
+            return result
+        finally:
+            await session.close()
+            # The session is bound to the event loop of this run
+            open_session.cache_clear()
@@ -0,0 +1,116 @@
+import asyncio
+
+import aiohttp
+
+try:
+    from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+except ImportError:
+    # ansible < 2.11
+    ArgumentSpecValidator = None
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    fan_out,
+    gen_args,
+    update_changed_flag,
+)
+
+
+def validate_items(module, name, excluded=()):
+    """Validate the items of the bulk parameter name, before the fan-out.
+
+    Each item is checked against the argument spec of the module, without
+    the parameters of excluded, and its no_log values are hidden from the
+    output of the module. Return the validated items, or the error.
+    """
+    argument_spec = {
+        k: v for k, v in module.argument_spec.items() if k not in excluded and k != name
+    }
+    items = []
+    for i, item in enumerate(module.params[name]):
+        for k, v in item.items():
+            if module.argument_spec.get(k, {}).get("no_log") and v is not None:
+                module.no_log_values.add(str(v))
+        unsupported = sorted(set(item) - set(argument_spec))
+        if unsupported:
+            return None, {
+                "failed": True,
+                "msg": "{}[{}]: Unsupported parameters: {}".format(
+                    name, i, ", ".join(unsupported)
+                ),
+            }
+        if ArgumentSpecValidator is None:
+            items.append(item)
+            continue
+        result = ArgumentSpecValidator(argument_spec).validate(item)
+        if result.error_messages:
+            return None, {
+                "failed": True,
+                "msg": "{}[{}]: {}".format(name, i, " ".join(result.error_messages)),
+            }
+        items.append(
+            {k: v for k, v in result.validated_parameters.items() if k in item}
+        )
+    return items, None
+
+
+async def run_bulk(func, params, items, session, concurrency=None):
+    """Run an operation once per item, concurrently.
+
+    Each item holds the parameters of one resource, the missing ones are taken
+    from params. The result of each item is returned in value, in order.
+    """
+    semaphore = asyncio.Semaphore(fan_out(session, concurrency))
+
+    async def _run(item):
+        unsupported = sorted(set(item) - set(params))
+        if unsupported:
+            return {
+                "failed": True,
+                "msg": "Unsupported parameters: {}".format(", ".join(unsupported)),
+            }
+        async with semaphore:
+            try:
+                return await func(dict(params, **item), session)
+            except aiohttp.ClientError as e:
+                return {"failed": True, "msg": str(e)}
+
+    results = list(await asyncio.gather(*[_run(item) for item in items]))
+    return {
+        "value": results,
+        "changed": any(i.get("changed") for i in results),
+        "failed": any(i.get("failed") for i in results),
+        "_debug_info": {"items": len(results)},
+    }
+
+
+async def run_on_vms(func, params, session, filters):
+    """Run an operation on the virtual machines of vms and of the filters.
+
+    The filters select virtual machines from /vcenter/vm, they are handled
+    along the ones of vms. Without vms and without filters, the operation
+    runs once, on vm. An empty list of virtual machines changes nothing.
+    """
+    filtered = any(params[i] for i in filters)
+    if params["vms"] is None and not filtered:
+        return await func(params, session)
+    vms = list(params["vms"] or [])
+    if filtered:
+        _url = "https://{vcenter_hostname}/rest/vcenter/vm".format(**params) + gen_args(
+            params, filters
+        )
+        async with session.get(_url) as resp:
+            _json = await resp.json()
+            if resp.status != 200:
+                return await update_changed_flag(_json, resp.status, "get")
+        vms += [i["vm"] for i in _json["value"]]
+    vms = list(dict.fromkeys(vms))
+    result = await run_bulk(
+        func,
+        params,
+        [{"vm": i} for i in vms],
+        session,
+        concurrency=params["vcenter_concurrency"],
+    )
+    for vm, item in zip(vms, result["value"]):
+        item["vm"] = vm
+    return result
@@ -0,0 +1,1049 @@
+import aiohttp
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import time
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    DEFAULT_TASK_TIMEOUT,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    backoff_delay,
+    fan_out,
+)
+
+
+ITEM_URL = "https://{vcenter_hostname}/rest/com/vmware/content/library/item"
+SUBSCRIBED_ITEM_URL = (
+    "https://{vcenter_hostname}/rest/com/vmware/content/library/subscribed-item"
+)
+ITEM_CHANGES_URL = (
+    "https://{vcenter_hostname}/rest/content/library/item/{library_item}/changes"
+)
+UPDATE_SESSION_URL = ITEM_URL + "/update-session"
+UPDATE_SESSION_FILE_URL = ITEM_URL + "/updatesession/file"
+DOWNLOAD_SESSION_URL = ITEM_URL + "/download-session"
+DOWNLOAD_SESSION_FILE_URL = ITEM_URL + "/downloadsession/file"
+
+# The files are read and sent by chunks of this size
+CHUNK_SIZE = 1024 * 1024
+# The downloads are split in segments of this size, fetched in parallel
+SEGMENT_SIZE = 64 * 1024 * 1024
+# The sessions expire after 5 minutes without a call, by default
+KEEP_ALIVE_INTERVAL = 60
+CHECKSUM_ALGORITHMS = {
+    "MD5": "md5",
+    "SHA1": "sha1",
+    "SHA256": "sha256",
+    "SHA512": "sha512",
+}
+TRANSFER_JOURNAL_DIR = os.path.expanduser("~/.ansible/vmware_rest/transfers")
+CHECKSUM_CACHE_DIR = os.path.expanduser("~/.ansible/vmware_rest/checksums")
+SYNC_WATERMARK_DIR = os.path.expanduser("~/.ansible/vmware_rest/sync")
+# The errors after which a transfer can be resumed
+INTERRUPTIONS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class TransferError(Exception):
+    pass
+
+
+async def call(session, method, _url, **kwargs):
+    """Send a content library request and return its value.
+
+    Raises TransferError if vCenter rejects it.
+    """
+    async with session.request(method, _url, **kwargs) as resp:
+        _json = {}
+        if resp.headers.get("Content-Type") == "application/json":
+            _json = await resp.json()
+        if resp.status >= 300:
+            raise TransferError(
+                "{} {} returned {}: {}".format(method, _url, resp.status, _json)
+            )
+        if isinstance(_json, list):
+            # The /rest/content endpoints do not wrap the value
+            return _json
+        return _json.get("value")
+
+
+def throughput(size, elapsed):
+    """Return the transfer rate, in MB/s."""
+    return round(size / max(elapsed, 1e-6) / 1024 / 1024, 2)
+
+
+def file_stat(path):
+    """Return what identifies the version of a local file."""
+    stat = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+
+
+class Journal(object):
+    """On-disk state of a transfer, from which a later run resumes it."""
+
+    def __init__(self, *key, cache_dir=TRANSFER_JOURNAL_DIR):
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        key = "\0".join(str(i) for i in key)
+        self.path = os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest())
+
+    def load(self):
+        try:
+            with open(self.path) as fd:
+                return json.load(fd)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, state):
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as tmp_fd:
+            json.dump(state, tmp_fd)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def file_checksum(path, algorithm="SHA256"):
+    """Return the checksum of a local file."""
+    _hash = hashlib.new(CHECKSUM_ALGORITHMS[algorithm])
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(CHUNK_SIZE), b""):
+            _hash.update(chunk)
+    return _hash.hexdigest()
+
+
+def local_files(files):
+    """Map the name of the files parameter in the library item to their version."""
+    return {
+        i.get("name") or os.path.basename(i["path"]): file_stat(i["path"])
+        for i in files
+    }
+
+
+class ChecksumCache(object):
+    """On-disk checksums of the local files, while their size and mtime match."""
+
+    def __init__(self, cache_dir=CHECKSUM_CACHE_DIR):
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        self.cache_dir = cache_dir
+
+    def entry(self, stat):
+        key = hashlib.sha256(stat["path"].encode()).hexdigest()
+        journal = Journal(key, cache_dir=self.cache_dir)
+        entry = journal.load()
+        if entry.get("size") != stat["size"] or entry.get("mtime") != stat["mtime"]:
+            entry = {"size": stat["size"], "mtime": stat["mtime"], "checksums": {}}
+        return journal, entry
+
+    def get(self, stat, algorithm):
+        journal, entry = self.entry(stat)
+        if algorithm not in entry["checksums"]:
+            entry["checksums"][algorithm] = file_checksum(stat["path"], algorithm)
+            journal.save(entry)
+        return entry["checksums"][algorithm]
+
+    def set(self, stat, algorithm, checksum):
+        journal, entry = self.entry(stat)
+        entry["checksums"][algorithm] = checksum
+        journal.save(entry)
+
+
+async def find_item(session, params):
+    """Return the ID of the item called name in the library, or None."""
+    ids = await call(
+        session,
+        "POST",
+        ITEM_URL.format(**params) + "?~action=find",
+        json={"spec": {"library_id": params["library_id"], "name": params["name"]}},
+    )
+    return ids[0] if ids else None
+
+
+async def create_item(session, params):
+    create_spec = {"library_id": params["library_id"], "name": params["name"]}
+    if params.get("type"):
+        create_spec["type"] = params["type"]
+    return await call(
+        session, "POST", ITEM_URL.format(**params), json={"create_spec": create_spec}
+    )
+
+
+async def copy_item(session, params, source_id):
+    """Copy a library item to the library, vCenter copies the files itself."""
+    return await call(
+        session,
+        "POST",
+        ITEM_URL.format(**params) + "/id:{}?~action=copy".format(source_id),
+        json={
+            "destination_create_spec": {
+                "library_id": params["library_id"],
+                "name": params["name"],
+            }
+        },
+    )
+
+
+class Dedup(object):
+    """Find a library item that already holds the local files.
+
+    An item matches if it has files of the same names, sizes and checksums.
+    The files of the candidate items are listed concurrently and compared by
+    size first, so the local files are only hashed when a candidate can
+    match. The checksums are computed with the algorithm vCenter reports,
+    and kept in a ChecksumCache so the unchanged files are not hashed again.
+    """
+
+    def __init__(self, session, params):
+        self.session = session
+        self.params = params
+        self.checksums = ChecksumCache()
+        self.semaphore = asyncio.Semaphore(
+            fan_out(session, params.get("vcenter_concurrency"))
+        )
+
+    async def list_items(self, library_id):
+        async with self.semaphore:
+            return await call(
+                self.session,
+                "GET",
+                ITEM_URL.format(**self.params) + "?library_id={}".format(library_id),
+            )
+
+    async def list_files(self, item_id):
+        async with self.semaphore:
+            return await call(
+                self.session,
+                "GET",
+                ITEM_URL.format(**self.params)
+                + "/file?library_item_id={}".format(item_id),
+            )
+
+    async def matches(self, files, item_files):
+        remote = {i["name"]: i for i in item_files}
+        if set(remote) != set(files) or any(
+            remote[name].get("size") != stat["size"] for name, stat in files.items()
+        ):
+            return False
+        loop = asyncio.get_event_loop()
+        for name, stat in files.items():
+            expected = remote[name].get("checksum_info") or {}
+            if expected.get("algorithm") not in CHECKSUM_ALGORITHMS:
+                return False
+            checksum = await loop.run_in_executor(
+                None, self.checksums.get, stat, expected["algorithm"]
+            )
+            if checksum != (expected.get("checksum") or "").lower():
+                return False
+        return True
+
+    async def holds(self, item_id, files):
+        """Whether the item already holds the files."""
+        if not files:
+            return False
+        return await self.matches(files, await self.list_files(item_id))
+
+    async def find(self, files, library_ids):
+        """Return the ID of an item of library_ids that holds the files, or None."""
+        if not files:
+            return None
+        candidates = []
+        for ids in await asyncio.gather(*[self.list_items(i) for i in library_ids]):
+            candidates += [i for i in ids if i not in candidates]
+        item_files = await asyncio.gather(*[self.list_files(i) for i in candidates])
+        for item_id, _files in zip(candidates, item_files):
+            if await self.matches(files, _files):
+                return item_id
+        return None
+
+
+class FileReader(object):
+    """Stream a local file, and compute its checksum on the fly.
+
+    The file is mapped in memory and the chunks are slices of the map, so the
+    content is not copied in a Python buffer before being sent. The checksum
+    is computed in the executor, hashlib releases the GIL on large buffers so
+    the files sent in parallel are hashed in parallel.
+
+    Only the bytes from offset are sent, the ones before were sent by an
+    interrupted run and are only hashed.
+    """
+
+    def __init__(self, path, algorithm="SHA256"):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.algorithm = algorithm
+        self.hash = None
+        self.offset = 0
+        self.sent = 0
+
+    @property
+    def checksum_info(self):
+        if not self.hash:
+            return None
+        return {"algorithm": self.algorithm, "checksum": self.hash.hexdigest()}
+
+    async def chunks(self):
+        self.hash = hashlib.new(CHECKSUM_ALGORITHMS[self.algorithm])
+        self.sent = self.offset
+        if not self.size:
+            return
+        loop = asyncio.get_event_loop()
+        with open(self.path, "rb") as fd:
+            mapped = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        try:
+            if self.offset:
+                chunk = view[: self.offset]
+                await loop.run_in_executor(None, self.hash.update, chunk)
+            for offset in range(self.offset, self.size, CHUNK_SIZE):
+                chunk = view[offset : offset + CHUNK_SIZE]
+                await loop.run_in_executor(None, self.hash.update, chunk)
+                yield chunk
+                self.sent += len(chunk)
+        finally:
+            chunk = None
+            try:
+                view.release()
+                mapped.close()
+            except BufferError:
+                # A chunk is still referenced, the map is closed once released
+                pass
+
+
+class Transfer(object):
+    """A transfer that runs in an update or a download session."""
+
+    session_url = None
+    progress_field = None
+
+    def __init__(self, session, params):
+        self.session = session
+        self.params = params
+        self.session_id = None
+
+    def url(self, template, action=None):
+        _url = template.format(**self.params)
+        if self.session_id:
+            _url += "/id:{}".format(self.session_id)
+        if action:
+            _url += "?~action={}".format(action)
+        return _url
+
+    @property
+    def progress(self):
+        """Percentage of the transfer reported in the keep-alive calls."""
+        return 0
+
+    def checkpoint(self):
+        """Save the progress of the transfer in its journal."""
+        pass
+
+    async def keep_alive(self):
+        interval = self.params.get("keep_alive_interval") or KEEP_ALIVE_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            self.checkpoint()
+            try:
+                await call(
+                    self.session,
+                    "POST",
+                    self.url(self.session_url, "keep-alive"),
+                    json={self.progress_field: self.progress},
+                )
+            except TransferError:
+                # The transfer fails later anyway if the session expired
+                pass
+
+
+class Upload(Transfer):
+    """Upload local files to a library item through an update session.
+
+    The update session is created, each file is added to it and pushed to
+    the endpoint vCenter returns, several files at a time. The session is
+    kept alive meanwhile, then validated and completed. It is failed if
+    something goes wrong, so it does not stay open.
+
+    The session is recorded in a journal. When the upload is interrupted,
+    e.g. the connection drops, the session is left open and the next run
+    with the same files resumes it: each file is pushed from the bytes
+    vCenter already received. The session of the journal is cancelled if
+    the files changed since, or if resume is disabled.
+    """
+
+    session_url = UPDATE_SESSION_URL
+    progress_field = "client_progress"
+
+    def __init__(self, session, params):
+        super(Upload, self).__init__(session, params)
+        self.readers = []
+        self.journal = Journal(
+            "upload", params["vcenter_hostname"], params["library_item_id"]
+        )
+        self.resumed = False
+
+    @property
+    def progress(self):
+        size = sum(i.size for i in self.readers)
+        sent = sum(i.sent for i in self.readers)
+        return int(sent * 100 / size) if size else 100
+
+    async def open(self, files):
+        """Create the update session, or resume the one of the journal."""
+        state = self.journal.load()
+        if state.get("update_session_id"):
+            self.session_id = state["update_session_id"]
+            try:
+                info = await call(self.session, "GET", self.url(UPDATE_SESSION_URL))
+            except TransferError:
+                # The session expired
+                info = {}
+            if info.get("state") == "ACTIVE":
+                if self.params.get("resume") and state.get("files") == files:
+                    self.resumed = True
+                    return
+                try:
+                    await call(
+                        self.session, "POST", self.url(UPDATE_SESSION_URL, "cancel")
+                    )
+                except TransferError:
+                    pass
+            self.session_id = None
+        self.session_id = await call(
+            self.session,
+            "POST",
+            self.url(UPDATE_SESSION_URL),
+            json={"create_spec": {"library_item_id": self.params["library_item_id"]}},
+        )
+        self.journal.save({"update_session_id": self.session_id, "files": files})
+
+    async def fail(self, error):
+        self.journal.delete()
+        try:
+            await call(
+                self.session,
+                "POST",
+                self.url(UPDATE_SESSION_URL, "fail"),
+                json={"client_error_message": str(error)},
+            )
+        except Exception:
+            pass
+
+    async def send(self, reader, uri, name):
+        while True:
+            headers = {
+                "Content-Length": str(reader.size - reader.offset),
+                "Content-Type": "application/octet-stream",
+            }
+            if reader.offset:
+                headers["Content-Range"] = "bytes {}-{}/{}".format(
+                    reader.offset, reader.size - 1, reader.size
+                )
+            async with self.session.put(
+                uri, data=reader.chunks, headers=headers
+            ) as resp:
+                if resp.status in [400, 416] and reader.offset:
+                    # The endpoint does not accept the range, send the whole file
+                    reader.offset = 0
+                    continue
+                if resp.status >= 300:
+                    raise TransferError(
+                        "Upload of {} returned {}: {}".format(
+                            name, resp.status, await resp.text()
+                        )
+                    )
+                return
+
+    async def push(self, reader, name):
+        file_info = None
+        if self.resumed:
+            try:
+                file_info = await call(
+                    self.session,
+                    "POST",
+                    self.url(UPDATE_SESSION_FILE_URL, "get"),
+                    json={"file_name": name},
+                )
+            except TransferError:
+                # The file was not added before the interruption
+                pass
+        if not file_info:
+            file_info = await call(
+                self.session,
+                "POST",
+                self.url(UPDATE_SESSION_FILE_URL, "add"),
+                json={
+                    "file_spec": {
+                        "name": name,
+                        "source_type": "PUSH",
+                        "size": reader.size,
+                    }
+                },
+            )
+        reader.offset = min(file_info.get("bytes_transferred") or 0, reader.size)
+        start = time.monotonic()
+        if reader.size and reader.offset == reader.size:
+            # Received before the interruption, the file is only hashed
+            async for _ in reader.chunks():
+                pass
+        else:
+            await self.send(reader, file_info["upload_endpoint"]["uri"], name)
+        resumed_from = reader.offset
+        elapsed = time.monotonic() - start
+        sent = reader.size - resumed_from
+        return {
+            "name": name,
+            "path": reader.path,
+            "size": reader.size,
+            "resumed_from": resumed_from,
+            "checksum_info": reader.checksum_info,
+            "elapsed": round(elapsed, 3),
+            "throughput": throughput(sent, elapsed),
+        }
+
+    async def wait(self):
+        """Wait for vCenter to import the files of the completed session."""
+        deadline = time.monotonic() + (
+            self.params.get("wait_timeout") or DEFAULT_TASK_TIMEOUT
+        )
+        attempt = 0
+        while True:
+            info = await call(self.session, "GET", self.url(UPDATE_SESSION_URL))
+            if info.get("state") != "ACTIVE":
+                return info
+            delay = backoff_delay(attempt)
+            if time.monotonic() + delay > deadline:
+                raise TransferError(
+                    "Timeout while vCenter imports the files of {}".format(
+                        self.session_id
+                    )
+                )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def run(self, files):
+        stats = local_files(files)
+        names = list(stats)
+        await self.open(stats)
+        keep_alive = asyncio.ensure_future(self.keep_alive())
+        try:
+            semaphore = asyncio.Semaphore(
+                fan_out(self.session, self.params.get("vcenter_concurrency"))
+            )
+
+            async def _push(reader, name):
+                async with semaphore:
+                    return await self.push(reader, name)
+
+            self.readers = [
+                FileReader(stats[i]["path"], self.params["checksum_algorithm"])
+                for i in names
+            ]
+            results = await asyncio.gather(
+                *[_push(reader, name) for reader, name in zip(self.readers, names)]
+            )
+            validation = await call(
+                self.session, "POST", self.url(UPDATE_SESSION_FILE_URL, "validate")
+            )
+            if validation.get("has_errors"):
+                raise TransferError("vCenter rejected the files: {}".format(validation))
+            await call(self.session, "POST", self.url(UPDATE_SESSION_URL, "complete"))
+            self.journal.delete()
+            checksums = ChecksumCache()
+            for name, reader in zip(names, self.readers):
+                checksums.set(stats[name], reader.algorithm, reader.hash.hexdigest())
+        except INTERRUPTIONS as e:
+            message = "The upload of the update session {} was interrupted: {}".format(
+                self.session_id, str(e) or repr(e)
+            )
+            if self.params.get("resume"):
+                raise TransferError(message + ", run the task again to resume it")
+            await self.fail(e)
+            raise TransferError(message)
+        except (Exception, asyncio.CancelledError) as e:
+            await self.fail(e)
+            raise
+        finally:
+            keep_alive.cancel()
+        info = await self.wait()
+        return {
+            "update_session_id": self.session_id,
+            "resumed": self.resumed,
+            "state": info.get("state"),
+            "error_message": info.get("error_message"),
+            "files": results,
+        }
+
+
+class FileWriter(object):
+    """Write the segments of a download to a preallocated local file.
+
+    The segments are written in parallel with pwrite. The checksum is
+    computed incrementally, each time the beginning of the file is complete
+    up to a further offset, by reading back the bytes from the page cache.
+
+    The segments of an interrupted run are continued if the file has the
+    same layout, the bytes they hold are hashed back from the file.
+    """
+
+    def __init__(
+        self, path, size, algorithm="SHA256", segment_size=SEGMENT_SIZE, segments=None
+    ):
+        self.path = path
+        self.size = size
+        self.hash = hashlib.new(CHECKSUM_ALGORITHMS[algorithm])
+        self.hashed = 0
+        segment_size = segment_size or size or 1
+        # The bytes written in each segment, from its start
+        self.segments = {i: 0 for i in range(0, size, segment_size)} or {0: 0}
+        if segments and set(segments) == set(self.segments):
+            self.segments = dict(segments)
+        self.received = sum(self.segments.values())
+        self.segment_size = segment_size
+        self._hash_lock = asyncio.Lock()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        os.ftruncate(self.fd, size)
+        if size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(self.fd, 0, size)
+            except OSError:
+                # Not supported by every file system, the file is sparse then
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+    def complete(self):
+        """Return the offset up to which the file is complete."""
+        offset = 0
+        for start in sorted(self.segments):
+            if start != offset:
+                break
+            offset = start + self.segments[start]
+            if self.segments[start] < min(self.segment_size, self.size - start):
+                break
+        return offset
+
+    async def write(self, start, data):
+        loop = asyncio.get_event_loop()
+        offset = start + self.segments[start]
+        await loop.run_in_executor(None, os.pwrite, self.fd, data, offset)
+        self.segments[start] += len(data)
+        self.received += len(data)
+        await self.update_hash()
+
+    async def update_hash(self):
+        async with self._hash_lock:
+            loop = asyncio.get_event_loop()
+            end = self.complete()
+            while self.hashed < end:
+                length = min(CHUNK_SIZE, end - self.hashed)
+                data = await loop.run_in_executor(
+                    None, os.pread, self.fd, length, self.hashed
+                )
+                await loop.run_in_executor(None, self.hash.update, data)
+                self.hashed += len(data)
+
+
+class Download(Transfer):
+    """Download the files of a library item through a download session.
+
+    The files are prepared by vCenter, then each file is fetched in segments
+    with HTTP Range requests, up to vcenter_concurrency requests at a time.
+    The files are written in place and renamed once complete and verified.
+    The session is kept alive meanwhile, and deleted at the end.
+
+    With resume, the segments written in each file are recorded in a journal
+    at each keep-alive and when the transfer is interrupted. The next run
+    continues the partial file if vCenter still has the same file.
+    """
+
+    session_url = DOWNLOAD_SESSION_URL
+    progress_field = "progress"
+
+    def __init__(self, session, params):
+        super(Download, self).__init__(session, params)
+        self.writers = []
+        self.journal = None
+        # The partial files, by name
+        self.parts = {}
+        if params.get("resume"):
+            self.journal = Journal(
+                "download",
+                params["vcenter_hostname"],
+                params["library_item_id"],
+                os.path.abspath(params["dest"]),
+            )
+            self.parts = self.journal.load().get("files", {})
+
+    @property
+    def progress(self):
+        size = sum(i.size for i in self.writers)
+        received = sum(i.received for i in self.writers)
+        return int(received * 100 / size) if size else 0
+
+    def checkpoint(self):
+        if not self.journal:
+            return
+        if self.parts:
+            self.journal.save({"files": self.parts})
+        else:
+            self.journal.delete()
+
+    async def prepare(self, name):
+        """Ask vCenter to prepare a file and wait until it can be downloaded."""
+        _url = self.url(DOWNLOAD_SESSION_FILE_URL, "prepare")
+        await call(
+            self.session,
+            "POST",
+            _url,
+            json={"file_name": name, "endpoint_type": "HTTPS"},
+        )
+        deadline = time.monotonic() + (
+            self.params.get("wait_timeout") or DEFAULT_TASK_TIMEOUT
+        )
+        attempt = 0
+        while True:
+            file_info = await call(
+                self.session,
+                "POST",
+                self.url(DOWNLOAD_SESSION_FILE_URL, "get"),
+                json={"file_name": name},
+            )
+            if file_info.get("status") == "PREPARED":
+                return file_info
+            if file_info.get("status") == "ERROR":
+                raise TransferError(
+                    "vCenter failed to prepare {}: {}".format(
+                        name, file_info.get("error_message")
+                    )
+                )
+            delay = backoff_delay(attempt)
+            if time.monotonic() + delay > deadline:
+                raise TransferError("Timeout while vCenter prepares {}".format(name))
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def fetch(self, uri, writer, start, semaphore):
+        """Download one segment, the connection errors resume it where it stopped."""
+        end = min(start + writer.segment_size, writer.size) - 1
+        attempt = 0
+        while True:
+            offset = start + writer.segments[start]
+            if writer.size and offset > end:
+                return
+            headers = {"Accept-Encoding": "identity"}
+            if writer.size:
+                headers["Range"] = "bytes={}-{}".format(offset, end)
+            try:
+                async with semaphore:
+                    async with self.session.request(
+                        "GET", uri, headers=headers
+                    ) as resp:
+                        if resp.status == 200 and (
+                            len(writer.segments) > 1 or offset > start
+                        ):
+                            raise TransferError(
+                                "The server does not support Range requests, set "
+                                "segment_size to 0 to download the files at once"
+                            )
+                        if resp.status not in [200, 206]:
+                            raise TransferError(
+                                "Download of {} returned {}: {}".format(
+                                    uri, resp.status, await resp.text()
+                                )
+                            )
+                        async for data in resp.content.iter_chunked(CHUNK_SIZE):
+                            await writer.write(start, data)
+                return
+            except INTERRUPTIONS:
+                self.checkpoint()
+                if attempt + 1 >= RETRY_ATTEMPTS:
+                    raise
+            self.session.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, base=RETRY_BASE_DELAY))
+            attempt += 1
+
+    async def download(self, file_info, semaphore):
+        name = file_info["name"]
+        path = os.path.join(self.params["dest"], name)
+        expected = file_info.get("checksum_info") or {}
+        algorithm = expected.get("algorithm") or "SHA256"
+        result = {"name": name, "path": path, "size": file_info.get("size")}
+        if (
+            expected.get("checksum")
+            and os.path.isfile(path)
+            and os.path.getsize(path) == file_info.get("size")
+        ):
+            loop = asyncio.get_event_loop()
+            checksum = await loop.run_in_executor(None, file_checksum, path, algorithm)
+            if checksum == expected["checksum"]:
+                result.update(checksum_info=expected, changed=False)
+                return result
+        async with semaphore:
+            file_info = await self.prepare(name)
+        size = file_info["size"]
+        part = path + ".part"
+        entry = self.parts.get(name) or {}
+        segments = None
+        if (
+            expected.get("checksum")
+            and entry.get("size") == size
+            and entry.get("checksum_info") == expected
+            and os.path.isfile(part)
+        ):
+            segments = {int(k): v for k, v in entry["segments"].items()}
+        writer = FileWriter(
+            part,
+            size,
+            algorithm,
+            segment_size=self.params.get("segment_size"),
+            segments=segments,
+        )
+        resumed_from = writer.received
+        self.parts[name] = {
+            "size": size,
+            "checksum_info": expected,
+            "segments": writer.segments,
+        }
+        self.writers.append(writer)
+        start = time.monotonic()
+        try:
+            await asyncio.gather(
+                *[
+                    self.fetch(
+                        file_info["download_endpoint"]["uri"], writer, i, semaphore
+                    )
+                    for i in writer.segments
+                ]
+            )
+            await writer.update_hash()
+        finally:
+            writer.close()
+        elapsed = time.monotonic() - start
+        checksum = writer.hash.hexdigest()
+        del self.parts[name]
+        if writer.received != size or (
+            expected.get("checksum") and checksum != expected["checksum"]
+        ):
+            raise TransferError(
+                "{} is corrupted: got {} bytes with the {} checksum {}, expected "
+                "{} bytes and {}".format(
+                    name, writer.received, algorithm, checksum, size, expected
+                )
+            )
+        os.rename(part, path)
+        result.update(
+            size=size,
+            checksum_info={"algorithm": algorithm, "checksum": checksum},
+            segments=len(writer.segments),
+            resumed_from=resumed_from,
+            elapsed=round(elapsed, 3),
+            throughput=throughput(size - resumed_from, elapsed),
+            changed=True,
+        )
+        return result
+
+    async def run(self, names=None):
+        self.session_id = await call(
+            self.session,
+            "POST",
+            self.url(DOWNLOAD_SESSION_URL),
+            json={"create_spec": {"library_item_id": self.params["library_item_id"]}},
+        )
+        keep_alive = asyncio.ensure_future(self.keep_alive())
+        try:
+            file_infos = await call(
+                self.session,
+                "GET",
+                DOWNLOAD_SESSION_FILE_URL.format(**self.params)
+                + "?download_session_id={}".format(self.session_id),
+            )
+            if names:
+                missing = set(names) - {i["name"] for i in file_infos}
+                if missing:
+                    raise TransferError(
+                        "The library item has no file named {}".format(
+                            ", ".join(sorted(missing))
+                        )
+                    )
+                file_infos = [i for i in file_infos if i["name"] in names]
+            semaphore = asyncio.Semaphore(
+                fan_out(self.session, self.params.get("vcenter_concurrency"))
+            )
+            results = await asyncio.gather(
+                *[self.download(i, semaphore) for i in file_infos]
+            )
+        except INTERRUPTIONS as e:
+            message = "The download was interrupted: {}".format(str(e) or repr(e))
+            if self.journal:
+                message += ", run the task again to resume it"
+            raise TransferError(message)
+        finally:
+            keep_alive.cancel()
+            self.checkpoint()
+            try:
+                await call(self.session, "DELETE", self.url(DOWNLOAD_SESSION_URL))
+            except TransferError:
+                # The session expires anyway
+                pass
+        return {"download_session_id": self.session_id, "files": results}
+
+
+def newer(version, watermark):
+    """Whether an item version is more recent than the one of the watermark."""
+    if watermark is None:
+        return True
+    try:
+        return int(version) > int(watermark)
+    except (TypeError, ValueError):
+        return version != watermark
+
+
+class LibrarySync(object):
+    """Sync the items of a subscribed library that changed since the last run.
+
+    The version of each synced item is recorded, this is the watermark. The
+    next run gets the changes of each item, or its content_version where the
+    item changes API is missing, and only syncs the items with a newer
+    version. The items go through a bounded queue, consumed by up to
+    vcenter_concurrency workers.
+    """
+
+    def __init__(self, session, params):
+        self.session = session
+        self.params = params
+        self.journal = Journal(
+            "sync",
+            params["vcenter_hostname"],
+            params["library_id"],
+            cache_dir=SYNC_WATERMARK_DIR,
+        )
+        self.watermark = {}
+        if not params.get("full"):
+            self.watermark = self.journal.load().get("versions", {})
+        self.synced = []
+
+    async def version(self, item_id):
+        """Return the version of an item and its changes since the watermark."""
+        previous = self.watermark.get(item_id)
+        try:
+            changes = await call(
+                self.session,
+                "GET",
+                ITEM_CHANGES_URL.format(library_item=item_id, **self.params),
+            )
+        except TransferError:
+            changes = None
+        if not changes:
+            info = await call(
+                self.session,
+                "GET",
+                ITEM_URL.format(**self.params) + "/id:{}".format(item_id),
+            )
+            return info.get("content_version"), []
+        version = changes[0].get("version")
+        for change in changes:
+            if newer(change.get("version"), version):
+                version = change.get("version")
+        return version, [i for i in changes if newer(i.get("version"), previous)]
+
+    async def sync(self, item_id, check_mode=False):
+        previous = self.watermark.get(item_id)
+        version, changes = await self.version(item_id)
+        if not newer(version, previous):
+            return
+        confirmed = None
+        if not check_mode:
+            await call(
+                self.session,
+                "POST",
+                SUBSCRIBED_ITEM_URL.format(**self.params)
+                + "/id:{}?~action=sync".format(item_id),
+                json={
+                    "force_sync_content": bool(self.params.get("force_sync_content"))
+                },
+            )
+            # The sync request is only accepted, the watermark moves once the
+            # item reports the version, the next run retries it otherwise
+            try:
+                synced_version, _ = await self.version(item_id)
+            except TransferError:
+                synced_version = None
+            confirmed = synced_version is not None and not newer(
+                version, synced_version
+            )
+            if confirmed:
+                self.watermark[item_id] = synced_version
+        self.synced.append(
+            {
+                "library_item_id": item_id,
+                "previous_version": previous,
+                "version": version,
+                "changes": changes,
+                "confirmed": confirmed,
+            }
+        )
+
+    async def run(self, check_mode=False):
+        item_ids = await call(
+            self.session,
+            "GET",
+            ITEM_URL.format(**self.params)
+            + "?library_id={}".format(self.params["library_id"]),
+        )
+        workers = max(
+            1,
+            min(
+                len(item_ids),
+                fan_out(self.session, self.params.get("vcenter_concurrency")),
+            ),
+        )
+        queue = asyncio.Queue(maxsize=workers)
+
+        async def produce():
+            for item_id in item_ids:
+                await queue.put(item_id)
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def consume():
+            while True:
+                item_id = await queue.get()
+                if item_id is None:
+                    return
+                await self.sync(item_id, check_mode)
+
+        tasks = [asyncio.ensure_future(produce())]
+        tasks += [asyncio.ensure_future(consume()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if not check_mode:
+                # The items removed from the library are dropped
+                self.journal.save(
+                    {
+                        "versions": {
+                            i: self.watermark[i]
+                            for i in item_ids
+                            if i in self.watermark
+                        }
+                    }
+                )
+        return {
+            "library_id": self.params["library_id"],
+            "items": sorted(self.synced, key=lambda i: i["library_item_id"]),
+            "unchanged": len(item_ids) - len(self.synced),
+        }
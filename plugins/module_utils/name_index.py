@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import re
+import time
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    INDEX_CACHE_DIR,
+    NAMED_RESOURCES,
+    get_param,
+    index_path,
+    set_param,
+)
+
+
+# The IDs (morefs) of these objects, they are used as they are
+NAMED_RESOURCE_IDS = {
+    "cluster": re.compile(r"^domain-c\d+$"),
+    "datacenter": re.compile(r"^datacenter-\d+$"),
+    "datastore": re.compile(r"^datastore-\d+$"),
+    "folder": re.compile(r"^group-[a-z]\d+$"),
+    "host": re.compile(r"^host-\d+$"),
+    "network": re.compile(r"^(network|dvportgroup)-\d+$"),
+    "resource_pool": re.compile(r"^resgroup-v?\d+$"),
+}
+INDEX_TTL = 10 * 60
+
+
+class NameIndex(object):
+    """Name to ID index of the vCenter inventory objects.
+
+    The index is built with one concurrent sweep of the NAMED_RESOURCES lists,
+    and kept in memory and on disk for INDEX_TTL seconds. Any successful
+    change on one of these lists drops it.
+    """
+
+    def __init__(self, hostname, username, cache_dir=INDEX_CACHE_DIR):
+        self.hostname = hostname
+        self.cache_dir = cache_dir
+        self.path = index_path(hostname, username, cache_dir)
+        self.entries = None
+        self.expires = 0
+        # Whether the entries were just listed from the vCenter
+        self.fresh = False
+
+    def load(self):
+        try:
+            with open(self.path) as fd:
+                entry = json.load(fd)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires", 0) < time.time():
+            return None
+        self.expires = entry["expires"]
+        self.fresh = False
+        return entry.get("entries")
+
+    def save(self):
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as tmp_fd:
+                json.dump({"entries": self.entries, "expires": self.expires}, tmp_fd)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def invalidate(self):
+        self.entries = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    async def build(self, session):
+        async def _list(resource_type):
+            collection, key = NAMED_RESOURCES[resource_type]
+            _url = "https://{hostname}{collection}".format(
+                hostname=self.hostname, collection=collection
+            )
+            async with session.get(_url) as resp:
+                if resp.status != 200:
+                    return {}
+                _json = await resp.json()
+            names = {}
+            for i in _json["value"]:
+                names.setdefault(i["name"], []).append(i[key])
+            return names
+
+        types = sorted(NAMED_RESOURCES)
+        results = await asyncio.gather(*[_list(i) for i in types])
+        self.entries = dict(zip(types, results))
+        self.expires = time.time() + INDEX_TTL
+        self.fresh = True
+        self.save()
+
+    async def get(self, session, refresh=False):
+        if refresh or self.entries is None or self.expires < time.time():
+            self.entries = None if refresh else self.load()
+            if self.entries is None:
+                await self.build(session)
+        return self.entries
+
+    async def resolve(self, session, resource_type, value):
+        """Return the IDs of the resource_type objects named value.
+
+        An existing ID is returned as is. The index is rebuilt once if the
+        value is unknown, the object may have been created since, unless it
+        was just listed.
+        """
+        if NAMED_RESOURCE_IDS[resource_type].match(value):
+            return [value]
+        for refresh in (False, True):
+            names = (await self.get(session, refresh=refresh))[resource_type]
+            if value in names:
+                return names[value]
+            if any(value in ids for ids in names.values()):
+                return [value]
+            if self.fresh:
+                break
+        return []
+
+
+def session_index(session):
+    """Return the NameIndex of session, created on first use."""
+    if session.index is None:
+        session.index = NameIndex(session.hostname, session.username)
+    return session.index
+
+
+async def resolve_names(session, params, named_parameters):
+    """Replace the names by IDs in the parameters that hold inventory objects.
+
+    named_parameters maps the (dotted) parameter paths to their NAMED_RESOURCES
+    type. Returns an error if a name matches several objects.
+    """
+    for path, resource_type in named_parameters.items():
+        value = get_param(params, path)
+        if not value or not isinstance(value, str):
+            continue
+        ids = await session_index(session).resolve(session, resource_type, value)
+        if len(ids) > 1:
+            return {
+                "failed": True,
+                "msg": "{}: several objects of type {} are named {}, use the ID instead: {}".format(
+                    path, resource_type, value, ", ".join(ids)
+                ),
+            }
+        if ids:
+            set_param(params, path, ids[0])
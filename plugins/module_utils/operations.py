@@ -0,0 +1,150 @@
+import asyncio
+import functools
+import time
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    DEFAULT_TASK_TIMEOUT,
+    backoff_delay,
+    device_id,
+    gen_args,
+    get_device_info,
+    spec_matches,
+    task_state,
+    update_changed_flag,
+)
+
+
+async def wait_for_task(session, vcenter_hostname, task, timeout=None):
+    """Poll a vCenter task until it succeeds, fails or timeout expires.
+
+    Return the status of the last polling request with the task result, a
+    polling error comes with its own status.
+    """
+    _url = "https://{hostname}/rest/cis/tasks/{task}".format(
+        hostname=vcenter_hostname, task=task
+    )
+    deadline = time.monotonic() + (timeout or DEFAULT_TASK_TIMEOUT)
+    attempt = 0
+    while True:
+        async with session.get(_url) as resp:
+            _json = await resp.json()
+        if resp.status != 200:
+            return resp.status, _json
+        state = task_state(task, _json["value"])
+        if state:
+            return resp.status, state
+        delay = backoff_delay(attempt)
+        if time.monotonic() + delay > deadline:
+            return (
+                resp.status,
+                {
+                    "type": "com.vmware.vapi.std.errors.timed_out",
+                    "value": _json["value"],
+                },
+            )
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def get_changes(session, _url, spec):
+    """Compare an update spec with the current state of the object at _url.
+
+    Returns the current object and the fields of spec that would change it.
+    If the object cannot be read, the whole spec is returned.
+    """
+    async with session.get(_url) as resp:
+        if resp.status != 200:
+            return None, spec
+        _json = await resp.json()
+    current = _json.get("value")
+    if not isinstance(current, dict):
+        return None, spec
+    changes = {}
+    for k, v in spec.items():
+        # The content and tagging APIs wrap the fields in an update_spec
+        if not spec_matches(v, current if k == "update_spec" else current.get(k)):
+            changes[k] = v
+    return current, changes
+
+
+def spec_diff(current, spec):
+    before = {}
+    for k in spec:
+        before[k] = current if k == "update_spec" else current.get(k)
+    return {"before": before, "after": spec}
+
+
+async def run_operation(operations, name, in_query_parameter, exists, params, session):
+    """Run one of the operations declared in the OPERATIONS table of a module.
+
+    Each declaration holds the HTTP method and the URL template of the
+    operation. With accepted_fields, these parameters are sent as the spec,
+    otherwise the in_query_parameter go in the query string. wait makes the
+    operation wait for the task it returns, task asks for this task with
+    vmw-task=true. changes marks the operations that always act when they
+    succeed, their success is a change. unchanged lists the vAPI errors that
+    mean that there is nothing to do, they are reported as unchanged.
+    """
+    declaration = operations[name]
+    accepted_fields = declaration.get("accepted_fields")
+    if declaration.get("task") and params["wait"]:
+        params["vmw-task"] = "true"
+    _url = declaration["url"].format(**params)
+    kwargs = {}
+    current = None
+    if accepted_fields is None:
+        _url += gen_args(params, in_query_parameter)
+    else:
+        if name == "create":
+            _exists = await exists(params, session)
+            if _exists:
+                return await update_changed_flag({"value": _exists}, 200, "get")
+        spec = {i: params[i] for i in accepted_fields if params[i]}
+        if name == "update":
+            current, spec = await get_changes(session, _url, spec)
+            if current is not None and not spec:
+                return await update_changed_flag({"value": current}, 200, "get")
+        kwargs["json"] = {"spec": spec}
+    async with session.request(declaration["method"].upper(), _url, **kwargs) as resp:
+        # NOTE: some operations answer with an empty body
+        _json = {}
+        if resp.headers.get("Content-Type") == "application/json":
+            _json = await resp.json()
+        if (
+            declaration.get("wait")
+            and params["wait"]
+            and (resp.status in [200, 201, 202])
+            and ("value" in _json)
+        ):
+            status, _json = await wait_for_task(
+                session,
+                params["vcenter_hostname"],
+                _json["value"],
+                timeout=params["wait_timeout"],
+            )
+            return await update_changed_flag(_json, status, name, task=True)
+        if (
+            name == "create"
+            and accepted_fields is not None
+            and (resp.status in [200, 201])
+            and ("value" in _json)
+        ):
+            _id = device_id(_json["value"])
+            _json = {"value": (await get_device_info(session, _url, _id))}
+        if current is not None:
+            _json["diff"] = spec_diff(current, spec)
+        if declaration.get("changes") and resp.status in [200, 204]:
+            _json["failed"] = False
+            _json["changed"] = True
+        _json = await update_changed_flag(_json, resp.status, name)
+        if _json.get("type") in declaration.get("unchanged", []):
+            _json["failed"] = False
+            _json["changed"] = False
+        return _json
+
+
+def operation(operations, name, in_query_parameter, exists=None):
+    """Return the declared operation as a func(params, session) coroutine."""
+    return functools.partial(
+        run_operation, operations, name, in_query_parameter, exists
+    )
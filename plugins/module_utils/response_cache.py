@@ -0,0 +1,194 @@
+import collections
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    RequestContextManager,
+    json_loads,
+)
+
+
+# The _info modules can cache their GET responses, for RESPONSE_CACHE_TTL
+# seconds or the TTL of the longest matching prefix of RESPONSE_CACHE_TTLS for
+# the reference data that seldom changes.
+RESPONSE_CACHE_TTL = 60
+RESPONSE_CACHE_TTLS = {
+    "/rest/api/esx/settings/depot-content/": 3600,
+    "/rest/api/stats/counter-sets": 3600,
+    "/rest/api/stats/counters": 3600,
+    "/rest/api/stats/rsrc-addr-schemas": 3600,
+    "/rest/api/stats/rsrc-types": 3600,
+    "/rest/api/vcenter/lcm/discovery/product-catalog": 3600,
+    "/rest/com/vmware/content/type": 86400,
+    "/rest/com/vmware/vapi/metadata/": 86400,
+    "/rest/com/vmware/vapi/rest/navigation/": 86400,
+    "/rest/com/vmware/vcenter/ovf/export-flag": 86400,
+    "/rest/com/vmware/vcenter/ovf/import-flag": 86400,
+}
+# Upper bound of the size of the cached bodies, per store
+RESPONSE_CACHE_SIZE = 64 * 1024 * 1024
+RESPONSE_CACHE_DIR = os.path.expanduser("~/.ansible/vmware_rest/responses")
+
+
+def response_ttl(_url):
+    path = urlparse(_url).path
+    ttl = RESPONSE_CACHE_TTL
+    matched = ""
+    for prefix, prefix_ttl in RESPONSE_CACHE_TTLS.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, ttl = prefix, prefix_ttl
+    return ttl
+
+
+class CachedResponse(object):
+    """Stand-in for a response served from a ResponseCache."""
+
+    buffered = True
+
+    def __init__(self, status, content_type, body, **kwargs):
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict({"Content-Type": content_type}))
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def text(self, encoding="utf-8"):
+        return self._body.decode(encoding)
+
+    async def json(self, *, loads=None, **kwargs):
+        return (loads or json_loads)(self._body)
+
+    def release(self):
+        pass
+
+
+class ResponseCache(object):
+    """In memory LRU cache of GET responses, bounded by the size of the bodies."""
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = collections.OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] < time.time():
+            self.pop(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= len(entry["body"])
+
+    def set(self, key, entry):
+        self.pop(key)
+        self.entries[key] = entry
+        self.size += len(entry["body"])
+        while self.size > self.max_size:
+            self.pop(next(iter(self.entries)))
+
+
+class DiskResponseCache(object):
+    """On-disk cache of GET responses, shared by the module processes.
+
+    Each entry is a file, a JSON header line followed by the body. The
+    least recently used files are dropped when the store grows over max_size.
+    """
+
+    def __init__(self, cache_dir=RESPONSE_CACHE_DIR, max_size=RESPONSE_CACHE_SIZE):
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fd:
+                header, body = fd.read().split(b"\n", 1)
+            entry = json.loads(header.decode())
+        except (OSError, ValueError):
+            return None
+        if entry["expires"] < time.time():
+            return None
+        os.utime(path)
+        entry["body"] = body
+        return entry
+
+    def set(self, key, entry):
+        header = {k: v for k, v in entry.items() if k != "body"}
+        path = self.path(key)
+        try:
+            fd = os.open(path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as tmp_fd:
+                tmp_fd.write(json.dumps(header).encode() + b"\n" + entry["body"])
+            os.replace(path + ".tmp", path)
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        files = []
+        for i in os.scandir(self.cache_dir):
+            stat = i.stat()
+            files.append((stat.st_mtime, stat.st_size, i.path))
+        size = sum(i[1] for i in files)
+        for _, file_size, path in sorted(files):
+            if size <= self.max_size:
+                break
+            os.unlink(path)
+            size -= file_size
+
+
+MEMORY_RESPONSE_CACHE = ResponseCache()
+
+
+def cached_get(session, _url, cache=None):
+    """GET _url on session, through the response caches.
+
+    cache is memory or disk to serve the response from a ResponseCache, the
+    other values send the request.
+    """
+    if cache in ["disk", "memory"]:
+        return RequestContextManager(_cached_get(session, _url, cache))
+    return session.get(_url)
+
+
+async def _cached_get(session, _url, cache):
+    stores = [MEMORY_RESPONSE_CACHE]
+    if cache == "disk":
+        if not session.disk_cache:
+            session.disk_cache = DiskResponseCache()
+        stores.append(session.disk_cache)
+    key = "\0".join(str(i) for i in (session.hostname, session.username, _url))
+    for store in stores:
+        entry = store.get(key)
+        if entry:
+            session.cache_stats["hits"] += 1
+            MEMORY_RESPONSE_CACHE.set(key, entry)
+            return CachedResponse(**entry)
+    session.cache_stats["misses"] += 1
+    resp = await session.get(_url)
+    if resp.status == 200:
+        entry = {
+            "status": resp.status,
+            "content_type": resp.headers.get("Content-Type", ""),
+            "body": await resp.read(),
+            "expires": time.time() + response_ttl(_url),
+        }
+        for store in stores:
+            store.set(key, entry)
+    return resp
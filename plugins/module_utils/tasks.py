@@ -0,0 +1,73 @@
+import asyncio
+import time
+from urllib.parse import quote, urlencode
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    DEFAULT_TASK_TIMEOUT,
+    backoff_delay,
+    task_state,
+)
+
+# Number of task IDs passed to one list call, to keep the URL reasonably short.
+TASKS_PER_QUERY = 100
+
+
+async def list_tasks(session, vcenter_hostname, tasks):
+    query = urlencode({"filter_spec.tasks": tasks}, doseq=True, quote_via=quote)
+    _url = "https://{hostname}/rest/cis/tasks?{query}".format(
+        hostname=vcenter_hostname, query=query
+    )
+    async with session.get(_url) as resp:
+        _json = await resp.json()
+    if resp.status != 200:
+        return _json
+    # NOTE: /rest serializes the map of the tasks as a list of key/value pairs
+    if isinstance(_json["value"], list):
+        _json["value"] = {i["key"]: i["value"] for i in _json["value"]}
+    return _json
+
+
+async def wait_for_tasks(session, vcenter_hostname, tasks, timeout=None):
+    """Wait for a list of vCenter tasks.
+
+    Each polling interval costs one list call per TASKS_PER_QUERY tasks still
+    running, the tasks in a final state get the time it took to reach it.
+    The tasks missing from the first list call do not exist, they fail the
+    wait at once instead of running into the timeout.
+    """
+    start = time.monotonic()
+    deadline = start + (timeout or DEFAULT_TASK_TIMEOUT)
+    pending = list(dict.fromkeys(tasks))
+    infos = {task: {"task": task} for task in pending}
+    unknown = []
+    polls = 0
+    while pending:
+        for i in range(0, len(pending), TASKS_PER_QUERY):
+            chunk = pending[i : i + TASKS_PER_QUERY]
+            _json = await list_tasks(session, vcenter_hostname, chunk)
+            if "type" in _json:
+                return _json
+            for task, info in _json["value"].items():
+                infos[task] = info
+                if task_state(task, info):
+                    info["elapsed"] = round(time.monotonic() - start, 3)
+            if not polls:
+                unknown += [i for i in chunk if i not in _json["value"]]
+        if unknown:
+            break
+        pending = [i for i in pending if "elapsed" not in infos[i]]
+        delay = backoff_delay(polls)
+        polls += 1
+        if pending and time.monotonic() + delay > deadline:
+            break
+        if pending:
+            await asyncio.sleep(delay)
+    _json = {"value": infos, "polls": polls}
+    if unknown:
+        _json["type"] = "com.vmware.vapi.std.errors.not_found"
+        _json["unknown"] = unknown
+    elif pending:
+        _json["type"] = "com.vmware.vapi.std.errors.timed_out"
+    elif any(i.get("status") == "FAILED" for i in infos.values()):
+        _json["type"] = "com.vmware.vapi.std.errors.error"
+    return _json
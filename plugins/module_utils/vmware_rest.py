@@ -1,24 +1,440 @@
 import aiohttp
 
-import functools
+import asyncio
+import email.utils
+import fcntl
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+import zlib
+from urllib.parse import quote, urlencode, urlparse
 from async_lru import alru_cache
 
+from ansible.module_utils.basic import env_fallback
 
-@alru_cache()
-async def open_session(
-    vcenter_hostname=None,
-    vcenter_username=None,
-    vcenter_password=None,
-    validate_certs=True,
-):
-    auth = aiohttp.BasicAuth(vcenter_username, vcenter_password)
-    connector = aiohttp.TCPConnector(limit=20, ssl=validate_certs)
-    async with aiohttp.ClientSession(
-        connector=connector, connector_owner=False
-    ) as session:
-        async with session.post(
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def json_codec(name=None):
+    """Return the name, loads and dumps functions of a JSON library.
+
+    orjson and ujson are a lot faster than json on the large responses, they
+    are used if they are installed, unless name asks for another one.
+    """
+    if name in [None, "orjson"] and orjson:
+        return "orjson", orjson.loads, lambda obj: orjson.dumps(obj).decode()
+    if name in [None, "orjson", "ujson"] and ujson:
+        return "ujson", ujson.loads, ujson.dumps
+    return "json", json.loads, json.dumps
+
+
+JSON_CODEC, json_loads, json_dumps = json_codec(os.environ.get("VMWARE_JSON_CODEC"))
+
+
+class Decompressor(object):
+    """zlib decompressor of the gzip and deflate bodies.
+
+    zlib detects the gzip or zlib header by itself, but some servers send a
+    raw deflate stream as deflate. The decompression then restarts in raw
+    mode, with the data received before the error.
+    """
+
+    def __init__(self):
+        self.decoder = zlib.decompressobj(wbits=zlib.MAX_WBITS | 32)
+        self.head = b""
+        self.raw = False
+
+    def decompress(self, data):
+        try:
+            out = self.decoder.decompress(data)
+        except zlib.error:
+            if self.raw or self.head is None:
+                raise
+            self.raw = True
+            self.decoder = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+            out = self.decoder.decompress(self.head + data)
+        # The head is only needed until the header has been accepted
+        self.head = None if out or self.head is None else self.head + data
+        return out
+
+    def flush(self):
+        return self.decoder.flush()
+
+
+class ClientResponse(aiohttp.ClientResponse):
+    """aiohttp.ClientResponse that decodes the JSON with JSON_CODEC.
+
+    The sessions do not let aiohttp decompress the bodies, read() does it
+    and counts the bytes received and decoded in transfer_stats.
+    """
+
+    transfer_stats = None
+
+    @property
+    def buffered(self):
+        return self._body is not None
+
+    async def read(self):
+        if self._body is not None:
+            # The shared GET responses are released once read
+            return self._body
+        body = await super(ClientResponse, self).read()
+        received = len(body)
+        encoding = self.headers.get("Content-Encoding", "").lower()
+        if encoding in ["gzip", "deflate"]:
+            decoder = Decompressor()
+            body = decoder.decompress(body) + decoder.flush()
+            self._body = body
+        if self.transfer_stats is not None:
+            self.transfer_stats["received"] += received
+            self.transfer_stats["decoded"] += len(body)
+        return body
+
+    async def json(self, *, loads=None, **kwargs):
+        return await super(ClientResponse, self).json(
+            loads=loads or json_loads, **kwargs
+        )
+
+
+class DecodedStream(object):
+    """File-like view of a response body, decompressed on the fly."""
+
+    def __init__(self, resp):
+        self.content = resp.content
+        self.transfer_stats = resp.transfer_stats
+        self.decoder = None
+        if resp.headers.get("Content-Encoding", "").lower() in ["gzip", "deflate"]:
+            self.decoder = Decompressor()
+
+    async def read(self, size=-1):
+        # ijson reads 0 bytes first to check the type of the data
+        if size == 0:
+            return b""
+        while not self.content.at_eof():
+            chunk = await self.content.readany()
+            data = self.decoder.decompress(chunk) if self.decoder else chunk
+            if self.transfer_stats is not None:
+                self.transfer_stats["received"] += len(chunk)
+                self.transfer_stats["decoded"] += len(data)
+            if data:
+                return data
+        if self.decoder:
+            data, self.decoder = self.decoder.flush(), None
+            return data
+        return b""
+
+
+async def iter_values(resp):
+    """Yield the entries of the value list of a response, one at a time.
+
+    With ijson, the body is parsed while it is received and the memory does
+    not grow with the size of the list. Only the responses of request() are
+    streamed, the ones of get() are already read and parsed whole.
+    """
+    if ijson and resp.status == 200 and not resp.buffered:
+        async for i in ijson.items(DecodedStream(resp), "value.item", use_float=True):
+            yield i
+        return
+    _json = await resp.json()
+    for i in _json["value"]:
+        yield i
+
+
+# vCenter drops the sessions that are idle for 30 minutes, we stop reusing a
+# stored session ID a bit before.
+SESSION_TTL = 25 * 60
+SESSION_CACHE_DIR = os.path.expanduser("~/.ansible/vmware_rest/sessions")
+SESSION_VERIFIER_ITERATIONS = 100000
+
+
+class FileLock(object):
+    """Exclusive lock on a file, shared with the other processes.
+
+    acquire() returns a context manager with its own file descriptor. The
+    coroutines of the process wait on an asyncio.Lock before they take the
+    flock, only one executor thread waits for the other processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.waiters = None
+
+    def acquire(self):
+        if self.waiters is None:
+            self.waiters = asyncio.Lock()
+        return FileLockHolder(self)
+
+
+class FileLockHolder(object):
+    def __init__(self, lock):
+        self.lock = lock
+        self.fd = None
+
+    async def __aenter__(self):
+        await self.lock.waiters.acquire()
+        try:
+            self.fd = os.open(self.lock.path, os.O_RDWR | os.O_CREAT, 0o600)
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, fcntl.flock, self.fd, fcntl.LOCK_EX)
+        except BaseException:
+            if self.fd is not None:
+                os.close(self.fd)
+            self.lock.waiters.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+        finally:
+            self.lock.waiters.release()
+
+
+class SessionStore(object):
+    """On-disk store of the vCenter session IDs, shared by the module processes.
+
+    The sessions are stored by vCenter and user. A salted PBKDF2 verifier of
+    the password is stored with the session ID, a session stored with
+    another password is dropped and replaced after a new login.
+    """
+
+    def __init__(self, hostname, username, password, cache_dir=SESSION_CACHE_DIR):
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        key = "\0".join(str(i) for i in (hostname, username))
+        self.path = os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest())
+        self.lock = FileLock(self.path + ".lock")
+        self.password = str(password or "")
+        self.salt = None
+        self.verifier = None
+
+    def verify(self, salt):
+        if salt != self.salt:
+            self.salt = salt
+            self.verifier = hashlib.pbkdf2_hmac(
+                "sha256",
+                self.password.encode(),
+                bytes.fromhex(salt),
+                SESSION_VERIFIER_ITERATIONS,
+            ).hex()
+        return self.verifier
+
+    def load(self):
+        try:
+            with open(self.path) as fd:
+                entry = json.load(fd)
+            verifier = self.verify(entry["salt"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if not hmac.compare_digest(entry.get("verifier", ""), verifier):
+            # Stored with another password
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            return None
+        if entry.get("expires", 0) < time.time():
+            return None
+        return entry.get("session_id")
+
+    def save(self, session_id):
+        salt = self.salt or os.urandom(16).hex()
+        entry = {
+            "session_id": session_id,
+            "salt": salt,
+            "verifier": self.verify(salt),
+            "expires": time.time() + SESSION_TTL,
+        }
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as tmp_fd:
+            json.dump(entry, tmp_fd)
+        os.replace(tmp_path, self.path)
+
+
+RATE_LIMIT_DIR = os.path.expanduser("~/.ansible/vmware_rest/rate_limit")
+
+
+class RateLimiter(object):
+    """Token bucket shared by the processes that talk to the same vCenter.
+
+    The state of the bucket is kept in a file and updated under its lock. A
+    request that finds the bucket empty reserves the next token and waits
+    for it.
+    """
+
+    def __init__(self, hostname, rate, burst=None, cache_dir=RATE_LIMIT_DIR):
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        key = str(hostname)
+        self.path = os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest())
+        self.lock = FileLock(self.path + ".lock")
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.waited = 0
+
+    def take(self):
+        now = time.time()
+        try:
+            with open(self.path) as fd:
+                state = json.load(fd)
+            tokens = state["tokens"] + (now - state["updated"]) * self.rate
+        except (OSError, ValueError, KeyError):
+            tokens = self.burst
+        tokens = min(self.burst, tokens) - 1
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as tmp_fd:
+            json.dump({"tokens": tokens, "updated": now}, tmp_fd)
+        os.replace(tmp_path, self.path)
+        return max(0, -tokens / self.rate)
+
+    async def acquire(self):
+        async with self.lock.acquire():
+            delay = self.take()
+        if delay:
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+
+# The inventory objects that can be designated by their name instead of their
+# ID, with the URL that lists them and the key of their ID.
+NAMED_RESOURCES = {
+    "cluster": ("/rest/vcenter/cluster", "cluster"),
+    "datacenter": ("/rest/vcenter/datacenter", "datacenter"),
+    "datastore": ("/rest/vcenter/datastore", "datastore"),
+    "folder": ("/rest/vcenter/folder", "folder"),
+    "host": ("/rest/vcenter/host", "host"),
+    "network": ("/rest/vcenter/network", "network"),
+    "resource_pool": ("/rest/vcenter/resource-pool", "resource_pool"),
+}
+INDEX_CACHE_DIR = os.path.expanduser("~/.ansible/vmware_rest/index")
+
+
+def index_path(hostname, username, cache_dir=INDEX_CACHE_DIR):
+    """Return the file of the name index of a vCenter and user."""
+    key = "\0".join(str(i) for i in (hostname, username))
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest())
+
+
+def changes_named_resource(_url):
+    """Whether a change on _url can change the name index."""
+    path = urlparse(_url).path
+    for collection, _ in NAMED_RESOURCES.values():
+        if path == collection or path.startswith(collection + "/"):
+            return True
+    return False
+
+
+# Transient failures are retried with an exponential backoff, up to
+# RETRY_ATTEMPTS times per request and RETRY_BUDGET times per session.
+RETRY_STATUSES = [429, 502, 503, 504]
+RETRY_ATTEMPTS = 5
+RETRY_BUDGET = 20
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30
+IDEMPOTENT_METHODS = ["DELETE", "GET", "HEAD", "OPTIONS", "PUT"]
+
+
+def retry_after(value):
+    """Return the delay in seconds asked by a Retry-After header, if any."""
+    if not value:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0, date.timestamp() - time.time())
+
+
+class RequestContextManager(object):
+    def __init__(self, coro):
+        self._coro = coro
+        self._resp = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._resp = await self._coro
+        return self._resp
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._resp.release()
+
+
+class RestSession(object):
+    """aiohttp.ClientSession wrapper that holds the vCenter session ID.
+
+    The session ID is injected in every request, and refreshed once if vCenter
+    rejects it with a 401.
+    """
+
+    def __init__(self, client, hostname, username, password, store=None, limiter=None):
+        self.client = client
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.store = store
+        self.limiter = limiter
+        self.session_id = None
+        self.reused = False
+        self.authentications = 0
+        self.retries = 0
+        self.transfer_stats = {"received": 0, "decoded": 0}
+        self.coalesced = 0
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.disk_cache = None
+        # The NameIndex of name_index.session_index(), if the module uses it
+        self.index = None
+        self._auth_lock = asyncio.Lock()
+        self._inflight = {}
+
+    @property
+    def connector(self):
+        return self.client.connector
+
+    @property
+    def debug_info(self):
+        stats = {"reused": self.reused, "authentications": self.authentications}
+        stats["retries"] = self.retries
+        if self.limiter:
+            stats["throttled"] = round(self.limiter.waited, 3)
+        if self.coalesced:
+            stats["coalesced"] = self.coalesced
+        if self.cache_stats["hits"] or self.cache_stats["misses"]:
+            stats["response_cache"] = dict(self.cache_stats)
+        if self.transfer_stats["received"]:
+            stats["transfer"] = dict(self.transfer_stats)
+            stats["transfer"]["ratio"] = round(
+                self.transfer_stats["decoded"] / self.transfer_stats["received"], 2
+            )
+        return {"session": stats}
+
+    async def login(self):
+        auth = aiohttp.BasicAuth(self.username, self.password)
+        if self.limiter:
+            await self.limiter.acquire()
+        async with self.client.post(
             "https://{hostname}/rest/com/vmware/cis/session".format(
-                hostname=vcenter_hostname
+                hostname=self.hostname
             ),
             auth=auth,
         ) as resp:
@@ -33,17 +449,461 @@ async def open_session(
                     )
                 except ImportError:
                     pass
-            json = await resp.json()
-            session_id = json["value"]
-            session = aiohttp.ClientSession(
-                connector=connector,
-                headers={
-                    "vmware-api-session-id": session_id,
-                    "content-type": "application/json",
-                },
-                connector_owner=False,
-            )
-            return session
+            _json = await resp.json()
+        self.authentications += 1
+        self.reused = False
+        return _json["value"]
+
+    async def authenticate(self, rejected=None):
+        async with self._auth_lock:
+            if self.session_id != rejected:
+                # Another request already got a new session ID
+                return
+            if not self.store:
+                self.session_id = await self.login()
+                return
+            async with self.store.lock.acquire():
+                session_id = self.store.load()
+                if session_id and session_id != rejected:
+                    self.session_id = session_id
+                    self.reused = True
+                else:
+                    self.session_id = await self.login()
+                self.store.save(self.session_id)
+
+    def can_retry(self, method, attempt, processed=True):
+        """Whether a failed request can be sent again.
+
+        A request that may have been processed by vCenter is only sent again
+        if its method is idempotent.
+        """
+        if attempt + 1 >= RETRY_ATTEMPTS or self.retries >= RETRY_BUDGET:
+            return False
+        return not processed or method in IDEMPOTENT_METHODS
+
+    async def _request(self, method, _url, **kwargs):
+        headers = dict(kwargs.pop("headers", None) or {})
+        # A streamed body is given as a function that returns it, so it can be
+        # sent again on a retry
+        data = kwargs.pop("data", None)
+        attempt = 0
+        reauthenticated = False
+        resent = False
+        while True:
+            session_id = self.session_id
+            headers["vmware-api-session-id"] = session_id
+            if self.limiter:
+                await self.limiter.acquire()
+            try:
+                if callable(data):
+                    kwargs["data"] = data()
+                elif data is not None:
+                    kwargs["data"] = data
+                resp = await self.client.request(
+                    method, _url, headers=headers, **kwargs
+                )
+                resp.transfer_stats = self.transfer_stats
+            except aiohttp.ClientConnectionError as e:
+                # ClientConnectorError: the connection could not be opened
+                processed = not isinstance(e, aiohttp.ClientConnectorError)
+                if not self.can_retry(method, attempt, processed=processed):
+                    raise
+                delay = backoff_delay(attempt, base=RETRY_BASE_DELAY)
+            else:
+                if resp.status == 401 and not reauthenticated:
+                    resp.release()
+                    await self.authenticate(rejected=session_id)
+                    reauthenticated = True
+                    continue
+                # 429 and 503 are answered before the request is processed
+                processed = resp.status not in [429, 503]
+                if resp.status not in RETRY_STATUSES or not self.can_retry(
+                    method, attempt, processed=processed
+                ):
+                    break
+                delay = retry_after(resp.headers.get("Retry-After"))
+                if delay is None:
+                    delay = backoff_delay(attempt, base=RETRY_BASE_DELAY)
+                resp.release()
+            attempt += 1
+            self.retries += 1
+            resent = resent or processed
+            await asyncio.sleep(min(delay, RETRY_MAX_DELAY))
+        if method == "DELETE" and resp.status == 404 and resent:
+            # The first DELETE was processed before the gateway or the
+            # connection failed, the resource is already gone
+            resp.status = 204
+        if method != "GET" and resp.status < 300 and changes_named_resource(_url):
+            self.drop_index()
+        return resp
+
+    def drop_index(self):
+        """Drop the name index, in memory and on disk."""
+        if self.index:
+            self.index.invalidate()
+            return
+        try:
+            os.unlink(index_path(self.hostname, self.username))
+        except OSError:
+            pass
+
+    def request(self, method, _url, **kwargs):
+        return RequestContextManager(self._request(method, _url, **kwargs))
+
+    async def _buffered_get(self, _url):
+        resp = await self._request("GET", _url)
+        try:
+            await resp.read()
+        finally:
+            resp.release()
+        return resp
+
+    async def _shared_get(self, _url):
+        future = self._inflight.get(_url)
+        if future is None:
+            future = asyncio.ensure_future(self._buffered_get(_url))
+            self._inflight[_url] = future
+
+            def _done(_):
+                if self._inflight.get(_url) is future:
+                    del self._inflight[_url]
+
+            future.add_done_callback(_done)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def get(self, _url, **kwargs):
+        """GET _url, the identical concurrent calls share the same request.
+
+        The body is read before the response is returned. Use
+        request("GET", ...) to stream it instead.
+        """
+        if kwargs:
+            return self.request("GET", _url, **kwargs)
+        return RequestContextManager(self._shared_get(_url))
+
+    def post(self, _url, **kwargs):
+        return self.request("POST", _url, **kwargs)
+
+    def put(self, _url, **kwargs):
+        return self.request("PUT", _url, **kwargs)
+
+    def patch(self, _url, **kwargs):
+        return self.request("PATCH", _url, **kwargs)
+
+    def delete(self, _url, **kwargs):
+        return self.request("DELETE", _url, **kwargs)
+
+    async def close(self):
+        await self.client.close()
+
+
+# Size of the connection pool, and the time an idle connection is kept
+# open for the next request. Reusing a connection saves the TCP and TLS
+# handshakes.
+DEFAULT_POOL_SIZE = 20
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+
+
+def ssl_context(validate_certs=True):
+    """Return the ssl argument of the connector.
+
+    aiohttp builds the default TLS context once, when it is imported, and
+    shares it between all its connectors. Building another one would load the
+    CA bundle a second time before the first request.
+    """
+    return validate_certs is not False
+
+
+@alru_cache()
+async def open_session(
+    vcenter_hostname=None,
+    vcenter_username=None,
+    vcenter_password=None,
+    validate_certs=True,
+    session_cache=False,
+    pool_size=None,
+    keepalive_timeout=None,
+    rate_limit=None,
+    rate_burst=None,
+    compression=True,
+):
+    store = None
+    if session_cache:
+        try:
+            store = SessionStore(vcenter_hostname, vcenter_username, vcenter_password)
+        except OSError:
+            pass
+    limiter = None
+    if rate_limit:
+        try:
+            limiter = RateLimiter(vcenter_hostname, rate_limit, burst=rate_burst)
+        except OSError:
+            pass
+    if keepalive_timeout is None:
+        keepalive_timeout = DEFAULT_KEEPALIVE_TIMEOUT
+    connector = aiohttp.TCPConnector(
+        limit=pool_size or DEFAULT_POOL_SIZE,
+        keepalive_timeout=keepalive_timeout,
+        ssl=ssl_context(validate_certs),
+    )
+    headers = {"content-type": "application/json"}
+    if compression is False:
+        headers["accept-encoding"] = "identity"
+    else:
+        headers["accept-encoding"] = "gzip, deflate"
+    client = aiohttp.ClientSession(
+        connector=connector,
+        headers=headers,
+        json_serialize=json_dumps,
+        response_class=ClientResponse,
+        auto_decompress=False,
+    )
+    session = RestSession(
+        client,
+        vcenter_hostname,
+        vcenter_username,
+        vcenter_password,
+        store=store,
+        limiter=limiter,
+    )
+    await session.authenticate()
+    return session
+
+
+def connection_argument_spec(response_cache=False):
+    """Return the argument spec of the vCenter connection parameters.
+
+    response_cache adds vcenter_response_cache, for the _info modules.
+    """
+    argument_spec = {
+        "vcenter_hostname": dict(
+            type="str", required=False, fallback=(env_fallback, ["VMWARE_HOST"])
+        ),
+        "vcenter_username": dict(
+            type="str", required=False, fallback=(env_fallback, ["VMWARE_USER"])
+        ),
+        "vcenter_password": dict(
+            type="str",
+            required=False,
+            no_log=True,
+            fallback=(env_fallback, ["VMWARE_PASSWORD"]),
+        ),
+        "vcenter_certs": dict(
+            type="bool",
+            required=False,
+            no_log=True,
+            fallback=(env_fallback, ["VMWARE_VALIDATE_CERTS"]),
+        ),
+        "vcenter_concurrency": dict(
+            type="int",
+            required=False,
+            fallback=(env_fallback, ["VMWARE_CONCURRENCY"]),
+        ),
+        "vcenter_session_cache": dict(
+            type="bool",
+            required=False,
+            fallback=(env_fallback, ["VMWARE_SESSION_CACHE"]),
+        ),
+        "vcenter_pool_size": dict(
+            type="int", required=False, fallback=(env_fallback, ["VMWARE_POOL_SIZE"])
+        ),
+        "vcenter_keepalive_timeout": dict(
+            type="float",
+            required=False,
+            fallback=(env_fallback, ["VMWARE_KEEPALIVE_TIMEOUT"]),
+        ),
+        "vcenter_rate_limit": dict(
+            type="float", required=False, fallback=(env_fallback, ["VMWARE_RATE_LIMIT"])
+        ),
+        "vcenter_rate_burst": dict(
+            type="int", required=False, fallback=(env_fallback, ["VMWARE_RATE_BURST"])
+        ),
+        "vcenter_compression": dict(
+            type="bool",
+            required=False,
+            fallback=(env_fallback, ["VMWARE_COMPRESSION"]),
+        ),
+    }
+    if response_cache:
+        argument_spec["vcenter_response_cache"] = dict(
+            type="str",
+            required=False,
+            choices=["disk", "memory", "none"],
+            fallback=(env_fallback, ["VMWARE_RESPONSE_CACHE"]),
+        )
+    return argument_spec
+
+
+async def open_session_from_params(params):
+    """Open the session of a module, from its connection parameters."""
+    return await open_session(
+        vcenter_hostname=params["vcenter_hostname"],
+        vcenter_username=params["vcenter_username"],
+        vcenter_password=params["vcenter_password"],
+        validate_certs=params["vcenter_certs"],
+        session_cache=params["vcenter_session_cache"],
+        pool_size=params["vcenter_pool_size"],
+        keepalive_timeout=params["vcenter_keepalive_timeout"],
+        rate_limit=params["vcenter_rate_limit"],
+        rate_burst=params["vcenter_rate_burst"],
+        compression=params["vcenter_compression"],
+    )
+
+
+# Upper bound of the GET requests list_devices() runs in parallel, the
+# connector limit of the session still applies on top of it.
+DEFAULT_CONCURRENCY = 10
+
+
+def fan_out(session, concurrency=None):
+    limits = [concurrency or DEFAULT_CONCURRENCY]
+    connector = session.connector
+    if connector:
+        limits += [i for i in (connector.limit, connector.limit_per_host) if i]
+    return max(1, min(limits))
+
+
+async def get_device_info(session, _url, _key):
+    async with session.get(((_url + "/") + _key)) as resp:
+        _json = await resp.json()
+        entry = _json["value"]
+        entry["_key"] = _key
+        return entry
+
+
+def device_id(device):
+    # NOTE: some collections only return the IDs, the other ones return a
+    # summary of each entry with the ID as first field
+    if isinstance(device, dict):
+        return list(device.values())[0]
+    return device
+
+
+async def get_devices(session, _url, devices, concurrency=None):
+    semaphore = asyncio.Semaphore(fan_out(session, concurrency))
+
+    async def _get(device):
+        async with semaphore:
+            return await get_device_info(session, _url, device_id(device))
+
+    return list(await asyncio.gather(*[_get(device) for device in devices]))
+
+
+async def list_devices(session, _url, concurrency=None):
+    async with session.request("GET", _url) as resp:
+        devices = [device_id(i) async for i in iter_values(resp)]
+    return await get_devices(session, _url, devices, concurrency=concurrency)
+
+
+def get_param(params, path):
+    if path in params:
+        return params[path]
+    value = params
+    for i in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(i)
+    return value
+
+
+def set_param(params, path, value):
+    if path in params:
+        params[path] = value
+        return
+    keys = path.split(".")
+    for i in keys[:-1]:
+        params = params[i]
+    params[keys[-1]] = value
+
+
+def match_device(device, identity, partial=False):
+    if not isinstance(device, dict):
+        return partial
+    for k, v in identity.items():
+        if partial and k not in device:
+            continue
+        if not spec_matches(v, device.get(k)):
+            return False
+    return True
+
+
+async def find_device(
+    session, _url, params, unicity_keys, filters=None, concurrency=None
+):
+    """Return the existing resource that has the identity of params.
+
+    unicity_keys are the paths of the params that identify the resource, the
+    last component being the name of the field of the resource, or a dict
+    that maps the paths with the fields when their names differ. A dict
+    value only has to match the keys it sets. filters maps the query
+    parameters of the list call with the params that feed them, this way
+    vCenter does the filtering and we only fetch the remaining candidates.
+    The filters only narrow the list, without a unicity key set nothing can
+    identify the resource.
+    """
+    if not isinstance(unicity_keys, dict):
+        unicity_keys = {path: path.split(".")[-1] for path in unicity_keys}
+    identity = {}
+    for path, field in unicity_keys.items():
+        value = get_param(params, path)
+        if value is not None:
+            identity[field] = value
+    if not identity:
+        return None
+    query = {}
+    for k, path in (filters or {}).items():
+        value = get_param(params, path)
+        if value is not None:
+            query[k] = value
+    list_url = _url
+    if query:
+        list_url += ("&" if "?" in _url else "?") + urlencode(
+            query, doseq=True, quote_via=quote
+        )
+    async with session.request("GET", list_url) as resp:
+        candidates = [
+            i
+            async for i in iter_values(resp)
+            if match_device(i, identity, partial=True)
+        ]
+    for device in await get_devices(session, _url, candidates, concurrency):
+        if match_device(device, identity):
+            return device
+
+
+# Used when wait_timeout is not set.
+DEFAULT_TASK_TIMEOUT = 3600
+TASK_ERRORS = [
+    "com.vmware.vapi.std.errors.error",
+    "com.vmware.vapi.std.errors.timed_out",
+]
+
+
+def backoff_delay(attempt, base=1, cap=30):
+    """Exponential backoff with jitter, the delay grows with attempt but never
+    goes over cap."""
+    delay = min(cap, base * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def task_state(task, info):
+    info["task"] = task
+    if info.get("status") == "SUCCEEDED":
+        return {"value": info}
+    if info.get("status") == "FAILED":
+        return {"type": "com.vmware.vapi.std.errors.error", "value": info}
+
+
+def spec_matches(value, current):
+    """Whether setting value would leave current unchanged.
+
+    Only the keys of value are compared, the object may hold more.
+    """
+    if isinstance(value, dict) and isinstance(current, dict):
+        return all(spec_matches(v, current.get(k)) for k, v in value.items())
+    return value == current
 
 
 def gen_args(params, in_query_parameter):
@@ -57,22 +917,37 @@ def gen_args(params, in_query_parameter):
         else:
             args += "&"
         if isinstance(v, list):
-            for j in v:
-                args += (i + "=") + j
+            args += "&".join((i + "=") + quote(j, safe="") for j in v)
         elif isinstance(v, bool) and v:
             args += i + "=true"
         else:
-            args += (i + "=") + v
+            args += (i + "=") + quote(v, safe="")
     return args
 
 
-async def update_changed_flag(data, status, operation):
-    if operation == "create" and status in [200, 201]:
+async def update_changed_flag(data, status, operation, task=False):
+    if data.get("type") in TASK_ERRORS:
+        # NOTE: the operation was accepted, but the task we waited for did not
+        # succeed
+        data["failed"] = True
+    elif task and status == 200:
+        # NOTE: the operation was accepted and its task succeeded
+        data["failed"] = False
+        data["changed"] = True
+    elif task and not data.get("type"):
+        # NOTE: polling the task failed without a vAPI error
+        data["failed"] = True
+    elif operation == "create" and status in [200, 201]:
         data["failed"] = False
         data["changed"] = True
     elif operation == "delete" and status in [200, 204]:
         data["failed"] = False
         data["changed"] = True
+    elif operation == "update" and status in [200, 204] and "diff" in data:
+        # NOTE: the update operations that compare the spec with the object
+        # only send the fields that differ
+        data["failed"] = False
+        data["changed"] = bool(data["diff"]["after"])
     elif data.get("type") == "com.vmware.vapi.std.errors.already_in_desired_state":
         data["failed"] = False
         data["changed"] = False
@@ -20,84 +20,47 @@ requirements:
 - python >= 3.6
 """
 IN_QUERY_PARAMETER = []
-from ansible.module_utils.basic import env_fallback
 
 try:
     from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
 except ImportError:
     from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    connection_argument_spec,
+    find_device,
     gen_args,
-    open_session,
+    get_device_info,
+    open_session_from_params,
     update_changed_flag,
 )
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.response_cache import (
+    cached_get,
+)
 
 
 def prepare_argument_spec():
-    argument_spec = {
-        "vcenter_hostname": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_HOST"])
-        ),
-        "vcenter_username": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_USER"])
-        ),
-        "vcenter_password": dict(
-            type="str",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_PASSWORD"]),
-        ),
-        "vcenter_certs": dict(
-            type="bool",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_VALIDATE_CERTS"]),
-        ),
-    }
+    argument_spec = connection_argument_spec(response_cache=True)
     argument_spec["tag_id"] = {"type": "str", "operationIds": ["get"]}
     return argument_spec
 
 
-async def get_device_info(params, session, _url, _key):
-    async with session.get(((_url + "/") + _key)) as resp:
-        _json = await resp.json()
-        entry = _json["value"]
-        entry["_key"] = _key
-        return entry
-
-
-async def list_devices(params, session):
-    existing_entries = []
-    _url = url(params)
-    async with session.get(_url) as resp:
-        _json = await resp.json()
-        devices = _json["value"]
-    for device in devices:
-        _id = list(device.values())[0]
-        existing_entries.append((await get_device_info(params, session, _url, _id)))
-    return existing_entries
-
-
 async def exists(params, session):
-    unicity_keys = ["bus", "pci_slot_number"]
-    devices = await list_devices(params, session)
-    for device in devices:
-        for k in unicity_keys:
-            if (params.get(k) is not None) and (device.get(k) != params.get(k)):
-                break
-        else:
-            return device
+    unicity_keys = []
+    return await find_device(
+        session,
+        url(params),
+        params,
+        unicity_keys,
+        concurrency=params["vcenter_concurrency"],
+    )
 
 
 async def main():
     module_args = prepare_argument_spec()
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
-    session = await open_session(
-        vcenter_hostname=module.params["vcenter_hostname"],
-        vcenter_username=module.params["vcenter_username"],
-        vcenter_password=module.params["vcenter_password"],
-    )
+    session = await open_session_from_params(module.params)
     result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
     module.exit_json(**result)
 
 
@@ -115,7 +78,9 @@ def url(params):
 
 
 async def entry_point(module, session):
-    async with session.get(url(module.params)) as resp:
+    async with cached_get(
+        session, url(module.params), module.params["vcenter_response_cache"]
+    ) as resp:
         _json = await resp.json()
         return await update_changed_flag(_json, resp.status, "get")
 
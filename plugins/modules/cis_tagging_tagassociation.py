@@ -68,40 +68,23 @@ requirements:
 - python >= 3.6
 """
 IN_QUERY_PARAMETER = ["~action"]
-from ansible.module_utils.basic import env_fallback
 
 try:
     from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
 except ImportError:
     from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
-    gen_args,
-    open_session,
-    update_changed_flag,
+    connection_argument_spec,
+    find_device,
+    open_session_from_params,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.operations import (
+    operation,
 )
 
 
 def prepare_argument_spec():
-    argument_spec = {
-        "vcenter_hostname": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_HOST"])
-        ),
-        "vcenter_username": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_USER"])
-        ),
-        "vcenter_password": dict(
-            type="str",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_PASSWORD"]),
-        ),
-        "vcenter_certs": dict(
-            type="bool",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_VALIDATE_CERTS"]),
-        ),
-    }
+    argument_spec = connection_argument_spec()
     argument_spec["~action"] = {
         "type": "str",
         "choices": ["attach-tag-to-multiple-objects", "list-attached-tags-on-objects"],
@@ -166,405 +149,95 @@ def prepare_argument_spec():
     return argument_spec
 
 
-async def get_device_info(params, session, _url, _key):
-    async with session.get(((_url + "/") + _key)) as resp:
-        _json = await resp.json()
-        entry = _json["value"]
-        entry["_key"] = _key
-        return entry
-
-
-async def list_devices(params, session):
-    existing_entries = []
-    _url = url(params)
-    async with session.get(_url) as resp:
-        _json = await resp.json()
-        devices = _json["value"]
-    for device in devices:
-        _id = list(device.values())[0]
-        existing_entries.append((await get_device_info(params, session, _url, _id)))
-    return existing_entries
-
-
 async def exists(params, session):
-    unicity_keys = ["bus", "pci_slot_number"]
-    devices = await list_devices(params, session)
-    for device in devices:
-        for k in unicity_keys:
-            if (params.get(k) is not None) and (device.get(k) != params.get(k)):
-                break
-        else:
-            return device
+    unicity_keys = []
+    return await find_device(
+        session,
+        url(params),
+        params,
+        unicity_keys,
+        concurrency=params["vcenter_concurrency"],
+    )
 
 
 async def main():
     module_args = prepare_argument_spec()
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
-    session = await open_session(
-        vcenter_hostname=module.params["vcenter_hostname"],
-        vcenter_username=module.params["vcenter_username"],
-        vcenter_password=module.params["vcenter_password"],
-    )
+    session = await open_session_from_params(module.params)
     result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
     module.exit_json(**result)
 
 
 def url(params):
-    return "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association".format(
-        **params
-    )
-
-
-async def entry_point(module, session):
-    func = globals()[("_" + module.params["state"])]
-    return await func(module.params, session)
-
-
-async def _attach(params, session):
-    accepted_fields = ["object_id"]
-    if "attach" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=attach".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("attach" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(_json, resp.status, "attach")
-
-
-async def _attach_multiple_tags_to_object(params, session):
-    accepted_fields = ["object_id", "tag_ids"]
-    if "attach_multiple_tags_to_object" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=attach-multiple-tags-to-object".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("attach_multiple_tags_to_object" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(
-            _json, resp.status, "attach_multiple_tags_to_object"
-        )
-
-
-async def _attach_tag_to_multiple_objects(params, session):
-    accepted_fields = ["object_ids"]
-    if "attach_tag_to_multiple_objects" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("attach_tag_to_multiple_objects" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(
-            _json, resp.status, "attach_tag_to_multiple_objects"
-        )
-
-
-async def _detach(params, session):
-    accepted_fields = ["object_id"]
-    if "detach" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=detach".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("detach" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(_json, resp.status, "detach")
-
-
-async def _detach_multiple_tags_from_object(params, session):
-    accepted_fields = ["object_id", "tag_ids"]
-    if "detach_multiple_tags_from_object" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=detach-multiple-tags-from-object".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("detach_multiple_tags_from_object" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(
-            _json, resp.status, "detach_multiple_tags_from_object"
+    return (
+        "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association".format(
+            **params
         )
-
-
-async def _detach_tag_from_multiple_objects(params, session):
-    accepted_fields = ["object_ids"]
-    if "detach_tag_from_multiple_objects" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=detach-tag-from-multiple-objects".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("detach_tag_from_multiple_objects" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(
-            _json, resp.status, "detach_tag_from_multiple_objects"
-        )
-
-
-async def _list_attachable_tags(params, session):
-    accepted_fields = ["object_id"]
-    if "list_attachable_tags" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=list-attachable-tags".format(
-        **params
     )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("list_attachable_tags" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(_json, resp.status, "list_attachable_tags")
 
 
-async def _list_attached_objects(params, session):
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=list-attached-objects".format(
-        **params
-    ) + gen_args(
-        params, IN_QUERY_PARAMETER
-    )
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "list_attached_objects")
-
-
-async def _list_attached_objects_on_tags(params, session):
-    accepted_fields = ["tag_ids"]
-    if "list_attached_objects_on_tags" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=list-attached-objects-on-tags".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("list_attached_objects_on_tags" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(
-            _json, resp.status, "list_attached_objects_on_tags"
-        )
-
-
-async def _list_attached_tags(params, session):
-    accepted_fields = ["object_id"]
-    if "list_attached_tags" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=list-attached-tags".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("list_attached_tags" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(_json, resp.status, "list_attached_tags")
+OPERATIONS = {
+    "attach": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=attach",
+        "accepted_fields": ["object_id"],
+    },
+    "attach_multiple_tags_to_object": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=attach-multiple-tags-to-object",
+        "accepted_fields": ["object_id", "tag_ids"],
+    },
+    "attach_tag_to_multiple_objects": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}",
+        "accepted_fields": ["object_ids"],
+    },
+    "detach": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=detach",
+        "accepted_fields": ["object_id"],
+    },
+    "detach_multiple_tags_from_object": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=detach-multiple-tags-from-object",
+        "accepted_fields": ["object_id", "tag_ids"],
+    },
+    "detach_tag_from_multiple_objects": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=detach-tag-from-multiple-objects",
+        "accepted_fields": ["object_ids"],
+    },
+    "list_attachable_tags": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=list-attachable-tags",
+        "accepted_fields": ["object_id"],
+    },
+    "list_attached_objects": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association/id:{tag_id}?~action=list-attached-objects",
+    },
+    "list_attached_objects_on_tags": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=list-attached-objects-on-tags",
+        "accepted_fields": ["tag_ids"],
+    },
+    "list_attached_tags": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association?~action=list-attached-tags",
+        "accepted_fields": ["object_id"],
+    },
+    "list_attached_tags_on_objects": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association",
+        "accepted_fields": ["object_ids"],
+    },
+}
 
 
-async def _list_attached_tags_on_objects(params, session):
-    accepted_fields = ["object_ids"]
-    if "list_attached_tags_on_objects" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/com/vmware/cis/tagging/tag-association".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("list_attached_tags_on_objects" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(
-            _json, resp.status, "list_attached_tags_on_objects"
-        )
+async def entry_point(module, session):
+    func = operation(OPERATIONS, module.params["state"], IN_QUERY_PARAMETER, exists)
+    return await func(module.params, session)
 
 
 if __name__ == "__main__":
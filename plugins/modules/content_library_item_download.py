@@ -0,0 +1,115 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+module: content_library_item_download
+short_description: Download the files of a content library item
+description:
+- Download the files of a library item, e.g. an OVF template and its disks, to a
+  local directory through a download session.
+- vCenter prepares the files, then each file is fetched in segments with HTTP
+  Range requests, up to C(vcenter_concurrency) requests at a time. The segments
+  are written in place in a preallocated file.
+- The checksum is verified while the file is received. A local file that already
+  has the expected size and checksum is not downloaded again.
+- The session is kept alive during the download, and deleted at the end.
+- With C(resume), the progress of each file is recorded in a journal under
+  C(~/.ansible/vmware_rest), and the next run continues the partial files of an
+  interrupted download.
+options:
+  dest:
+    description:
+    - The local directory where the files are written.
+    required: true
+    type: path
+  files:
+    description:
+    - The names of the files to download. Default to all the files of the item.
+    elements: str
+    type: list
+  keep_alive_interval:
+    default: 60
+    description:
+    - Time between two keep-alive calls on the download session, in seconds.
+    type: int
+  library_item_id:
+    description:
+    - Identifier of the library item.
+    - 'The parameter must be an identifier for the resource type: com.vmware.content.library.Item.'
+    required: true
+    type: str
+  resume:
+    default: true
+    description:
+    - Resume the download interrupted by a previous run.
+    type: bool
+  segment_size:
+    default: 67108864
+    description:
+    - The size of the segments, in bytes. C(0) downloads each file with one request.
+    type: int
+  wait_timeout:
+    description:
+    - Maximum time to wait for vCenter to prepare a file, in seconds. Default to
+      3600.
+    type: int
+author:
+- Ansible VMware team
+version_added: 1.0.0
+requirements:
+- python >= 3.6
+"""
+
+try:
+    from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
+except ImportError:
+    from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.content_library import (
+    SEGMENT_SIZE,
+    Download,
+    TransferError,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    connection_argument_spec,
+    open_session_from_params,
+)
+
+
+def prepare_argument_spec():
+    argument_spec = connection_argument_spec()
+    argument_spec["wait_timeout"] = {"type": "int"}
+    argument_spec["resume"] = {"type": "bool", "default": True}
+    argument_spec["segment_size"] = {"type": "int", "default": SEGMENT_SIZE}
+    argument_spec["library_item_id"] = {"type": "str", "required": True}
+    argument_spec["keep_alive_interval"] = {"type": "int", "default": 60}
+    argument_spec["files"] = {"type": "list", "elements": "str"}
+    argument_spec["dest"] = {"type": "path", "required": True}
+    return argument_spec
+
+
+async def main():
+    module_args = prepare_argument_spec()
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    session = await open_session_from_params(module.params)
+    result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
+    module.exit_json(**result)
+
+
+async def entry_point(module, session):
+    if module.check_mode:
+        return {"changed": True}
+    try:
+        value = await Download(session, module.params).run(module.params["files"])
+    except (OSError, TransferError) as e:
+        return {"failed": True, "msg": str(e)}
+    changed = [i.pop("changed") for i in value["files"]]
+    return {"value": value, "changed": any(changed)}
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
@@ -0,0 +1,228 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+module: content_library_item_upload
+short_description: Upload local files to a content library item
+description:
+- Upload local files, e.g. an OVF template and its disks or an ISO image, to a
+  library item through an update session.
+- The module creates the update session, adds the files, streams them to the
+  upload endpoints returned by vCenter, then validates and completes the session.
+  The session is failed if vCenter rejects a file.
+- Up to C(vcenter_concurrency) files are sent in parallel. The session is kept
+  alive during the upload.
+- The checksum of each file is computed while it is sent and returned.
+- The update session is recorded in a journal under C(~/.ansible/vmware_rest).
+  When the upload is interrupted, the session is left open and the next run with
+  the same files resumes it, each file is sent from the bytes vCenter already
+  received. A session left by a previous run is cancelled if the files changed.
+- Instead of C(library_item_id), C(library_id) and C(name) designate the item.
+  It is created if the library has no item of this name.
+- Nothing is uploaded if the item already holds the same files, compared by name,
+  size and checksum. The checksums of the local files are kept under C(~/.ansible/vmware_rest),
+  so the unchanged files are not hashed again.
+- With C(dedup), if another item of C(dedup_library_ids) holds the same files,
+  vCenter copies it to create the item instead.
+options:
+  checksum_algorithm:
+    choices:
+    - MD5
+    - SHA1
+    - SHA256
+    - SHA512
+    default: SHA256
+    description:
+    - The algorithm of the returned checksums.
+    type: str
+  dedup:
+    default: false
+    description:
+    - Copy an item of C(dedup_library_ids) that already holds the files to create
+      the item, instead of uploading them.
+    type: bool
+  dedup_library_ids:
+    description:
+    - The libraries where an item that holds the files is searched. Default to
+      C(library_id).
+    elements: str
+    type: list
+  files:
+    description:
+    - The local files to upload.
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description:
+        - The name of the file in the library item. Default to the base name of
+          C(path).
+        type: str
+      path:
+        description:
+        - The path of the local file.
+        required: true
+        type: path
+    type: list
+  keep_alive_interval:
+    default: 60
+    description:
+    - Time between two keep-alive calls on the update session, in seconds.
+    type: int
+  library_id:
+    description:
+    - Identifier of the library of the item, with C(name). Mutually exclusive
+      with C(library_item_id).
+    - 'The parameter must be an identifier for the resource type: com.vmware.content.Library.'
+    type: str
+  library_item_id:
+    description:
+    - Identifier of the library item to update.
+    - Required if C(library_id) and C(name) are not set.
+    - 'The parameter must be an identifier for the resource type: com.vmware.content.library.Item.'
+    type: str
+  name:
+    description:
+    - The name of the library item, with C(library_id).
+    type: str
+  resume:
+    default: true
+    description:
+    - Resume the upload interrupted by a previous run.
+    - When disabled, an interrupted upload fails its update session.
+    type: bool
+  type:
+    description:
+    - The type of the library item created with C(library_id) and C(name), e.g.
+      C(ovf) or C(iso).
+    type: str
+  wait_timeout:
+    description:
+    - Maximum time to wait for vCenter to import the files once the session is
+      completed, in seconds. Default to 3600.
+    type: int
+author:
+- Ansible VMware team
+version_added: 1.0.0
+requirements:
+- python >= 3.6
+"""
+
+try:
+    from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
+except ImportError:
+    from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.content_library import (
+    CHECKSUM_ALGORITHMS,
+    Dedup,
+    INTERRUPTIONS,
+    TransferError,
+    Upload,
+    copy_item,
+    create_item,
+    find_item,
+    local_files,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    connection_argument_spec,
+    open_session_from_params,
+)
+
+
+def prepare_argument_spec():
+    argument_spec = connection_argument_spec()
+    argument_spec["wait_timeout"] = {"type": "int"}
+    argument_spec["resume"] = {"type": "bool", "default": True}
+    argument_spec["type"] = {"type": "str"}
+    argument_spec["name"] = {"type": "str"}
+    argument_spec["library_item_id"] = {"type": "str"}
+    argument_spec["library_id"] = {"type": "str"}
+    argument_spec["keep_alive_interval"] = {"type": "int", "default": 60}
+    argument_spec["files"] = {
+        "type": "list",
+        "elements": "dict",
+        "required": True,
+        "options": {
+            "name": {"type": "str"},
+            "path": {"type": "path", "required": True},
+        },
+    }
+    argument_spec["checksum_algorithm"] = {
+        "type": "str",
+        "choices": sorted(CHECKSUM_ALGORITHMS),
+        "default": "SHA256",
+    }
+    argument_spec["dedup_library_ids"] = {"type": "list", "elements": "str"}
+    argument_spec["dedup"] = {"type": "bool", "default": False}
+    return argument_spec
+
+
+async def main():
+    module_args = prepare_argument_spec()
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    session = await open_session_from_params(module.params)
+    result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
+    module.exit_json(**result)
+
+
+async def entry_point(module, session):
+    params = module.params
+    if bool(params["library_item_id"]) == bool(params["library_id"] and params["name"]):
+        return {
+            "failed": True,
+            "msg": "Either library_item_id, or library_id and name are required",
+        }
+    try:
+        files = local_files(params["files"])
+        dedup = Dedup(session, params)
+        if not params["library_item_id"]:
+            params["library_item_id"] = await find_item(session, params)
+        if params["library_item_id"] and await dedup.holds(
+            params["library_item_id"], files
+        ):
+            return {
+                "value": {
+                    "library_item_id": params["library_item_id"],
+                    "copied_from": None,
+                },
+                "changed": False,
+            }
+        if params["dedup"] and not params["library_item_id"]:
+            # Only the items to create can be copied from another one
+            library_ids = params["dedup_library_ids"] or [params["library_id"]]
+            source_id = await dedup.find(files, library_ids)
+            if source_id:
+                if module.check_mode:
+                    return {"changed": True}
+                return {
+                    "value": {
+                        "library_item_id": await copy_item(session, params, source_id),
+                        "copied_from": source_id,
+                    },
+                    "changed": True,
+                }
+        if module.check_mode:
+            return {"changed": True}
+        if not params["library_item_id"]:
+            params["library_item_id"] = await create_item(session, params)
+        value = await Upload(session, params).run(params["files"])
+    except (OSError, TransferError) + INTERRUPTIONS as e:
+        # asyncio.TimeoutError has no message
+        return {"failed": True, "msg": str(e) or type(e).__name__}
+    value.update(library_item_id=params["library_item_id"], copied_from=None)
+    result = {"value": value, "changed": True}
+    if value["state"] != "DONE":
+        result["failed"] = True
+        result["msg"] = "The update session ended in the {} state: {}".format(
+            value["state"], value["error_message"]
+        )
+    return result
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
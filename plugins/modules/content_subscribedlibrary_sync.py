@@ -0,0 +1,90 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+module: content_subscribedlibrary_sync
+short_description: Sync the items of a subscribed library that changed
+description:
+- Sync only the items of a subscribed library that changed since the previous run
+  of the module, instead of the whole library.
+- The version of each synced item is recorded under C(~/.ansible/vmware_rest), this
+  is the watermark of the library. The next run gets the changes of each item, or
+  its C(content_version) on the vCenters without the item changes API, and sends
+  a sync request for the items with a newer version.
+- The version of an item is read again after its sync request, it is only recorded
+  if the item reports it (C(confirmed)), the next run syncs the other ones again.
+- The items are checked and synced through a bounded queue, up to
+  C(vcenter_concurrency) at a time. vCenter syncs the items in the background.
+- In check mode, the items that changed are returned and the watermark is kept.
+options:
+  force_sync_content:
+    default: false
+    description:
+    - Sync the content of the items, not only their metadata, like the
+      C(force_sync_content) option of M(content_library_subscribeditem).
+    type: bool
+  full:
+    default: false
+    description:
+    - Ignore the watermark and sync all the items of the library.
+    type: bool
+  library_id:
+    description:
+    - Identifier of the subscribed library.
+    - 'The parameter must be an identifier for the resource type: com.vmware.content.Library.'
+    required: true
+    type: str
+author:
+- Ansible VMware team
+version_added: 1.0.0
+requirements:
+- python >= 3.6
+"""
+
+try:
+    from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
+except ImportError:
+    from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.content_library import (
+    LibrarySync,
+    TransferError,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    connection_argument_spec,
+    open_session_from_params,
+)
+
+
+def prepare_argument_spec():
+    argument_spec = connection_argument_spec()
+    argument_spec["library_id"] = {"type": "str", "required": True}
+    argument_spec["full"] = {"type": "bool", "default": False}
+    argument_spec["force_sync_content"] = {"type": "bool", "default": False}
+    return argument_spec
+
+
+async def main():
+    module_args = prepare_argument_spec()
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    session = await open_session_from_params(module.params)
+    result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
+    module.exit_json(**result)
+
+
+async def entry_point(module, session):
+    try:
+        value = await LibrarySync(session, module.params).run(
+            check_mode=module.check_mode
+        )
+    except (OSError, TransferError) as e:
+        return {"failed": True, "msg": str(e)}
+    return {"value": value, "changed": bool(value["items"])}
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
@@ -40,6 +40,15 @@ options:
     description:
     - vmw-task=true Required with I(state=['validate'])
     type: str
+  wait:
+    description:
+    - Wait for the vCenter task started by the operation to complete and return its
+      final state instead of the task identifier.
+    type: bool
+  wait_timeout:
+    description:
+    - Maximum time to wait for the task, in seconds. Default to 3600.
+    type: int
 author:
 - Ansible VMware team
 version_added: 1.0.0
@@ -47,39 +56,30 @@ requirements:
 - python >= 3.6
 """
 IN_QUERY_PARAMETER = ["action", "vmw-task"]
-from ansible.module_utils.basic import env_fallback
 
 try:
     from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
 except ImportError:
     from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
-    gen_args,
-    open_session,
-    update_changed_flag,
+    connection_argument_spec,
+    find_device,
+    open_session_from_params,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.operations import (
+    operation,
 )
 
 
 def prepare_argument_spec():
-    argument_spec = {
-        "vcenter_hostname": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_HOST"])
-        ),
-        "vcenter_username": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_USER"])
-        ),
-        "vcenter_password": dict(
-            type="str",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_PASSWORD"]),
-        ),
-        "vcenter_certs": dict(
-            type="bool",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_VALIDATE_CERTS"]),
-        ),
+    argument_spec = connection_argument_spec()
+    argument_spec["wait_timeout"] = {
+        "type": "int",
+        "operationIds": ["commit", "scan", "validate"],
+    }
+    argument_spec["wait"] = {
+        "type": "bool",
+        "operationIds": ["commit", "scan", "validate"],
     }
     argument_spec["vmw-task"] = {
         "type": "str",
@@ -120,46 +120,23 @@ def prepare_argument_spec():
     return argument_spec
 
 
-async def get_device_info(params, session, _url, _key):
-    async with session.get(((_url + "/") + _key)) as resp:
-        _json = await resp.json()
-        entry = _json["value"]
-        entry["_key"] = _key
-        return entry
-
-
-async def list_devices(params, session):
-    existing_entries = []
-    _url = url(params)
-    async with session.get(_url) as resp:
-        _json = await resp.json()
-        devices = _json["value"]
-    for device in devices:
-        _id = list(device.values())[0]
-        existing_entries.append((await get_device_info(params, session, _url, _id)))
-    return existing_entries
-
-
 async def exists(params, session):
-    unicity_keys = ["bus", "pci_slot_number"]
-    devices = await list_devices(params, session)
-    for device in devices:
-        for k in unicity_keys:
-            if (params.get(k) is not None) and (device.get(k) != params.get(k)):
-                break
-        else:
-            return device
+    unicity_keys = []
+    return await find_device(
+        session,
+        url(params),
+        params,
+        unicity_keys,
+        concurrency=params["vcenter_concurrency"],
+    )
 
 
 async def main():
     module_args = prepare_argument_spec()
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
-    session = await open_session(
-        vcenter_hostname=module.params["vcenter_hostname"],
-        vcenter_username=module.params["vcenter_username"],
-        vcenter_password=module.params["vcenter_password"],
-    )
+    session = await open_session_from_params(module.params)
     result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
     module.exit_json(**result)
 
 
@@ -169,99 +146,41 @@ def url(params):
     )
 
 
-async def entry_point(module, session):
-    func = globals()[("_" + module.params["state"])]
-    return await func(module.params, session)
-
-
-async def _commit(params, session):
-    _url = "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}?action=commit&vmw-task=true".format(
-        **params
-    ) + gen_args(
-        params, IN_QUERY_PARAMETER
-    )
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "commit")
-
-
-async def _create(params, session):
-    _url = "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts".format(
-        **params
-    ) + gen_args(
-        params, IN_QUERY_PARAMETER
-    )
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "create")
-
-
-async def _delete(params, session):
-    _url = "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}".format(
-        **params
-    ) + gen_args(
-        params, IN_QUERY_PARAMETER
-    )
-    async with session.delete(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "delete")
-
-
-async def _import_software_spec(params, session):
-    _url = "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts?action=import-software-spec".format(
-        **params
-    ) + gen_args(
-        params, IN_QUERY_PARAMETER
-    )
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "import_software_spec")
-
-
-async def _scan(params, session):
-    _url = "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}?action=scan&vmw-task=true".format(
-        **params
-    ) + gen_args(
-        params, IN_QUERY_PARAMETER
-    )
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "scan")
+OPERATIONS = {
+    "commit": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}?action=commit&vmw-task=true",
+        "wait": True,
+    },
+    "create": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts",
+    },
+    "delete": {
+        "method": "delete",
+        "url": "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}",
+    },
+    "import_software_spec": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts?action=import-software-spec",
+    },
+    "scan": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}?action=scan&vmw-task=true",
+        "wait": True,
+    },
+    "validate": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}",
+        "wait": True,
+        "task": True,
+    },
+}
 
 
-async def _validate(params, session):
-    _url = "https://{vcenter_hostname}/rest/api/esx/settings/clusters/{cluster}/software/drafts/{draft}".format(
-        **params
-    ) + gen_args(
-        params, IN_QUERY_PARAMETER
-    )
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "validate")
+async def entry_point(module, session):
+    func = operation(OPERATIONS, module.params["state"], IN_QUERY_PARAMETER, exists)
+    return await func(module.params, session)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+module: rest_cis_tasks_wait
+short_description: Wait for a list of vCenter tasks
+description:
+- Wait for a list of vCenter tasks, e.g. the ones returned by the C(vmw-task=true)
+  operations, to reach a final state.
+- The tasks are polled together with one list call per polling interval, whatever
+  the number of tasks.
+- The module fails at once if a task does not exist.
+options:
+  tasks:
+    description:
+    - Identifiers of the tasks to wait for.
+    - 'The parameter must be an identifier for the resource type: cis.task.'
+    elements: str
+    required: true
+    type: list
+  wait_timeout:
+    description:
+    - Maximum time to wait for the tasks, in seconds. Default to 3600.
+    type: int
+author:
+- Ansible VMware team
+version_added: 1.0.0
+requirements:
+- python >= 3.6
+"""
+
+try:
+    from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
+except ImportError:
+    from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    connection_argument_spec,
+    open_session_from_params,
+    update_changed_flag,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.tasks import (
+    wait_for_tasks,
+)
+
+
+def prepare_argument_spec():
+    argument_spec = connection_argument_spec()
+    argument_spec["wait_timeout"] = {"type": "int"}
+    argument_spec["tasks"] = {"type": "list", "elements": "str", "required": True}
+    return argument_spec
+
+
+async def main():
+    module_args = prepare_argument_spec()
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    session = await open_session_from_params(module.params)
+    result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
+    module.exit_json(**result)
+
+
+async def entry_point(module, session):
+    _json = await wait_for_tasks(
+        session,
+        module.params["vcenter_hostname"],
+        module.params["tasks"],
+        timeout=module.params["wait_timeout"],
+    )
+    polls = _json.pop("polls", None)
+    result = await update_changed_flag(_json, 200, "get")
+    result["_debug_info"]["polls"] = polls
+    return result
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
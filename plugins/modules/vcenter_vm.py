@@ -86,6 +86,7 @@ options:
     description:
     - Identifier of the datastore on which the virtual machine's configuration state
       is stored.
+    - The datastore can also be designated by its name.
     - If unset, VM.RegisterSpec.path must also be unset and VM.RegisterSpec.datastore-path
       must be set.
     - 'When clients pass a value of this structure as a parameter, the field must
@@ -409,6 +410,8 @@ options:
   placement:
     description:
     - Virtual machine placement information.
+    - The C(cluster), C(datastore), C(folder), C(host) and C(resource_pool) can also
+      be designated by their name.
     - If this field is unset, the system will use the values from the source virtual
       machine. If specified, each field will be used for placement. If the fields
       result in disjoint placement the operation will fail. If the fields along with
@@ -513,6 +516,18 @@ options:
       a value of this structure as a result, the field will be an identifier for the
       resource type: VirtualMachine. Required with I(state=[''clone'', ''instant_clone''])'
     type: str
+  specs:
+    description:
+    - List of virtual machines to handle in one run, e.g. to provision a fleet.
+    - Each element is a dict with the parameters of one virtual machine (e.g. C(name),
+      C(placement) and C(source)), the parameters it does not set are taken from
+      the task. They are validated like the parameters of the task, the C(state)
+      and the C(vcenter_*) parameters cannot be set per virtual machine.
+    - The virtual machines are handled concurrently, up to C(vcenter_concurrency)
+      at a time, and the result of each of them is returned in C(value), in the
+      same order.
+    elements: dict
+    type: list
   state:
     choices:
     - clone
@@ -547,6 +562,15 @@ options:
     - 'The parameter must be an identifier for the resource type: VirtualMachine.
       Required with I(state=[''delete'', ''relocate'', ''unregister''])'
     type: str
+  wait:
+    description:
+    - Wait for the vCenter task started by the operation to complete and return its
+      final state instead of the task identifier.
+    type: bool
+  wait_timeout:
+    description:
+    - Maximum time to wait for the task, in seconds. Default to 3600.
+    type: int
 author:
 - Ansible VMware team
 version_added: 1.0.0
@@ -554,40 +578,61 @@ requirements:
 - python >= 3.6
 """
 IN_QUERY_PARAMETER = []
-from ansible.module_utils.basic import env_fallback
+NAMED_PARAMETERS = {
+    "datastore": "datastore",
+    "placement.cluster": "cluster",
+    "placement.datastore": "datastore",
+    "placement.folder": "folder",
+    "placement.host": "host",
+    "placement.resource_pool": "resource_pool",
+}
+# NOTE: the items of specs share the session and the operation of the task
+BULK_EXCLUDED_PARAMETERS = [
+    "state",
+    "vcenter_certs",
+    "vcenter_compression",
+    "vcenter_concurrency",
+    "vcenter_hostname",
+    "vcenter_keepalive_timeout",
+    "vcenter_password",
+    "vcenter_pool_size",
+    "vcenter_rate_burst",
+    "vcenter_rate_limit",
+    "vcenter_session_cache",
+    "vcenter_username",
+]
 
 try:
     from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
 except ImportError:
     from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
-    gen_args,
-    open_session,
+    connection_argument_spec,
+    find_device,
+    get_device_info,
+    open_session_from_params,
     update_changed_flag,
 )
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.operations import (
+    operation,
+    wait_for_task,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.bulk import (
+    run_bulk,
+    validate_items,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.name_index import (
+    resolve_names,
+)
 
 
 def prepare_argument_spec():
-    argument_spec = {
-        "vcenter_hostname": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_HOST"])
-        ),
-        "vcenter_username": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_USER"])
-        ),
-        "vcenter_password": dict(
-            type="str",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_PASSWORD"]),
-        ),
-        "vcenter_certs": dict(
-            type="bool",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_VALIDATE_CERTS"]),
-        ),
+    argument_spec = connection_argument_spec()
+    argument_spec["wait_timeout"] = {
+        "type": "int",
+        "operationIds": ["clone", "relocate"],
     }
+    argument_spec["wait"] = {"type": "bool", "operationIds": ["clone", "relocate"]}
     argument_spec["vm"] = {
         "type": "str",
         "operationIds": ["delete", "relocate", "unregister"],
@@ -605,6 +650,19 @@ def prepare_argument_spec():
             "unregister",
         ],
     }
+    argument_spec["specs"] = {
+        "type": "list",
+        "elements": "dict",
+        "operationIds": [
+            "clone",
+            "create",
+            "delete",
+            "instant_clone",
+            "register",
+            "relocate",
+            "unregister",
+        ],
+    }
     argument_spec["source"] = {
         "type": "str",
         "operationIds": ["clone", "instant_clone"],
@@ -853,46 +911,25 @@ def prepare_argument_spec():
     return argument_spec
 
 
-async def get_device_info(params, session, _url, _key):
-    async with session.get(((_url + "/") + _key)) as resp:
-        _json = await resp.json()
-        entry = _json["value"]
-        entry["_key"] = _key
-        return entry
-
-
-async def list_devices(params, session):
-    existing_entries = []
-    _url = url(params)
-    async with session.get(_url) as resp:
-        _json = await resp.json()
-        devices = _json["value"]
-    for device in devices:
-        _id = list(device.values())[0]
-        existing_entries.append((await get_device_info(params, session, _url, _id)))
-    return existing_entries
-
-
 async def exists(params, session):
-    unicity_keys = ["bus", "pci_slot_number"]
-    devices = await list_devices(params, session)
-    for device in devices:
-        for k in unicity_keys:
-            if (params.get(k) is not None) and (device.get(k) != params.get(k)):
-                break
-        else:
-            return device
+    unicity_keys = ["name"]
+    filters = {"filter.folders": "placement.folder", "filter.names": "name"}
+    return await find_device(
+        session,
+        url(params),
+        params,
+        unicity_keys,
+        filters=filters,
+        concurrency=params["vcenter_concurrency"],
+    )
 
 
 async def main():
     module_args = prepare_argument_spec()
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
-    session = await open_session(
-        vcenter_hostname=module.params["vcenter_hostname"],
-        vcenter_username=module.params["vcenter_username"],
-        vcenter_password=module.params["vcenter_password"],
-    )
+    session = await open_session_from_params(module.params)
     result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
     module.exit_json(**result)
 
 
@@ -900,8 +937,75 @@ def url(params):
     return "https://{vcenter_hostname}/rest/vcenter/vm".format(**params)
 
 
+OPERATIONS = {
+    "create": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm",
+        "accepted_fields": [
+            "boot",
+            "boot_devices",
+            "cdroms",
+            "cpu",
+            "disks",
+            "floppies",
+            "guest_OS",
+            "hardware_version",
+            "memory",
+            "name",
+            "nics",
+            "parallel_ports",
+            "placement",
+            "sata_adapters",
+            "scsi_adapters",
+            "serial_ports",
+            "storage_policy",
+        ],
+    },
+    "delete": {
+        "method": "delete",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm/{vm}",
+    },
+    "register": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm?action=register",
+        "accepted_fields": ["datastore", "datastore_path", "name", "path", "placement"],
+    },
+    "relocate": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm/{vm}?action=relocate&vmw-task=true",
+        "accepted_fields": ["disks", "placement"],
+        "wait": True,
+    },
+    "unregister": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm/{vm}?action=unregister",
+    },
+}
+
+
 async def entry_point(module, session):
-    func = globals()[("_" + module.params["state"])]
+    if module.params["state"] in OPERATIONS:
+        func = operation(OPERATIONS, module.params["state"], IN_QUERY_PARAMETER, exists)
+    else:
+        func = globals()[("_" + module.params["state"])]
+    error = await resolve_names(session, module.params, NAMED_PARAMETERS)
+    if error:
+        return error
+    if module.params["specs"]:
+        specs, error = validate_items(module, "specs", BULK_EXCLUDED_PARAMETERS)
+        if error:
+            return error
+        for spec in specs:
+            error = await resolve_names(session, spec, NAMED_PARAMETERS)
+            if error:
+                return error
+        return await run_bulk(
+            func,
+            module.params,
+            specs,
+            session,
+            concurrency=module.params["vcenter_concurrency"],
+        )
     return await func(module.params, session)
 
 
@@ -915,16 +1019,17 @@ async def _clone(params, session):
         "power_on",
         "source",
     ]
-    if "clone" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
+    _exists = await exists(params, session)
+    if _exists:
+        return await update_changed_flag({"value": _exists}, 200, "get")
     spec = {}
     for i in accepted_fields:
         if params[i]:
             spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm?action=clone&vmw-task=true".format(
-        **params
+    _url = (
+        "https://{vcenter_hostname}/rest/vcenter/vm?action=clone&vmw-task=true".format(
+            **params
+        )
     )
     async with session.post(_url, json={"spec": spec}) as resp:
         try:
@@ -932,76 +1037,17 @@ async def _clone(params, session):
                 _json = await resp.json()
         except KeyError:
             _json = {}
-        if ("clone" == "create") and (resp.status in [200, 201]) and ("value" in _json):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
+        if params["wait"] and (resp.status in [200, 201, 202]) and ("value" in _json):
+            status, _json = await wait_for_task(
+                session,
+                params["vcenter_hostname"],
+                _json["value"],
+                timeout=params["wait_timeout"],
+            )
+            return await update_changed_flag(_json, status, "clone", task=True)
         return await update_changed_flag(_json, resp.status, "clone")
 
 
-async def _create(params, session):
-    accepted_fields = [
-        "boot",
-        "boot_devices",
-        "cdroms",
-        "cpu",
-        "disks",
-        "floppies",
-        "guest_OS",
-        "hardware_version",
-        "memory",
-        "name",
-        "nics",
-        "parallel_ports",
-        "placement",
-        "sata_adapters",
-        "scsi_adapters",
-        "serial_ports",
-        "storage_policy",
-    ]
-    if "create" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm".format(**params)
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("create" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(_json, resp.status, "create")
-
-
-async def _delete(params, session):
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}".format(
-        **params
-    ) + gen_args(params, IN_QUERY_PARAMETER)
-    async with session.delete(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "delete")
-
-
 async def _instant_clone(params, session):
     accepted_fields = [
         "bios_uuid",
@@ -1013,10 +1059,9 @@ async def _instant_clone(params, session):
         "serial_ports_to_update",
         "source",
     ]
-    if "instant_clone" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
+    _exists = await exists(params, session)
+    if _exists:
+        return await update_changed_flag({"value": _exists}, 200, "get")
     spec = {}
     for i in accepted_fields:
         if params[i]:
@@ -1035,89 +1080,14 @@ async def _instant_clone(params, session):
             and (resp.status in [200, 201])
             and ("value" in _json)
         ):
-            if type(_json["value"]) == dict:
+            if isinstance(_json["value"], dict):
                 _id = list(_json["value"].values())[0]
             else:
                 _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
+            _json = {"value": (await get_device_info(session, _url, _id))}
         return await update_changed_flag(_json, resp.status, "instant_clone")
 
 
-async def _register(params, session):
-    accepted_fields = ["datastore", "datastore_path", "name", "path", "placement"]
-    if "register" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm?action=register".format(**params)
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("register" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(_json, resp.status, "register")
-
-
-async def _relocate(params, session):
-    accepted_fields = ["disks", "placement"]
-    if "relocate" == "create":
-        _exists = await exists(params, session)
-        if _exists:
-            return await update_changed_flag({"value": _exists}, 200, "get")
-    spec = {}
-    for i in accepted_fields:
-        if params[i]:
-            spec[i] = params[i]
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}?action=relocate&vmw-task=true".format(
-        **params
-    )
-    async with session.post(_url, json={"spec": spec}) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        if (
-            ("relocate" == "create")
-            and (resp.status in [200, 201])
-            and ("value" in _json)
-        ):
-            if type(_json["value"]) == dict:
-                _id = list(_json["value"].values())[0]
-            else:
-                _id = _json["value"]
-            _json = {"value": (await get_device_info(params, session, _url, _id))}
-        return await update_changed_flag(_json, resp.status, "relocate")
-
-
-async def _unregister(params, session):
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}?action=unregister".format(
-        **params
-    ) + gen_args(params, IN_QUERY_PARAMETER)
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "unregister")
-
-
 if __name__ == "__main__":
     import asyncio
 
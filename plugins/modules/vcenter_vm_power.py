@@ -9,6 +9,66 @@ module: vcenter_vm_power
 short_description: Handle resource of type vcenter_vm_power
 description: Handle resource of type vcenter_vm_power
 options:
+  filter.clusters:
+    description:
+    - Clusters that must contain the virtual machine for the virtual machine to match
+      the filter.
+    - If unset or empty, virtual machines in any cluster match the filter.
+    - 'When clients pass a value of this structure as a parameter, the field must
+      contain identifiers for the resource type: ClusterComputeResource. When operations
+      return a value of this structure as a result, the field will contain identifiers
+      for the resource type: ClusterComputeResource.'
+    type: list
+  filter.datacenters:
+    description:
+    - Datacenters that must contain the virtual machine for the virtual machine to
+      match the filter.
+    - If unset or empty, virtual machines in any datacenter match the filter.
+    - 'When clients pass a value of this structure as a parameter, the field must
+      contain identifiers for the resource type: Datacenter. When operations return
+      a value of this structure as a result, the field will contain identifiers for
+      the resource type: Datacenter.'
+    type: list
+  filter.folders:
+    description:
+    - Folders that must contain the virtual machine for the virtual machine to match
+      the filter.
+    - If unset or empty, virtual machines in any folder match the filter.
+    - 'When clients pass a value of this structure as a parameter, the field must
+      contain identifiers for the resource type: Folder. When operations return a
+      value of this structure as a result, the field will contain identifiers for
+      the resource type: Folder.'
+    type: list
+  filter.hosts:
+    description:
+    - Hosts that must contain the virtual machine for the virtual machine to match
+      the filter.
+    - If unset or empty, virtual machines on any host match the filter.
+    - 'When clients pass a value of this structure as a parameter, the field must
+      contain identifiers for the resource type: HostSystem. When operations return
+      a value of this structure as a result, the field will contain identifiers for
+      the resource type: HostSystem.'
+    type: list
+  filter.names:
+    description:
+    - Names that virtual machines must have to match the filter (see VM.Info.name).
+    - If unset or empty, virtual machines with any name match the filter.
+    type: list
+  filter.power_states:
+    description:
+    - Power states that a virtual machine must be in to match the filter (see Power.Info.state.
+    - If unset or empty, virtual machines in any power state match the filter.
+    type: list
+  filter.resource_pools:
+    description:
+    - Resource pools that must contain the virtual machine for the virtual machine
+      to match the filter.
+    - If unset or empty, virtual machines in any resource pool match the filter.
+    - 'When clients pass a value of this structure as a parameter, the field must
+      contain identifiers for the resource type: ResourcePool. When operations return
+      a value of this structure as a result, the field will contain identifiers for
+      the resource type: ResourcePool.'
+    type: list
   state:
     choices:
     - reset
@@ -22,6 +82,18 @@ options:
     - Virtual machine identifier.
     - 'The parameter must be an identifier for the resource type: VirtualMachine.'
     type: str
+  vms:
+    description:
+    - Identifiers of the virtual machines to handle in one run, instead of C(vm).
+    - The C(filter.*) parameters select virtual machines the same way as with vcenter_vm_info,
+      they are handled along the ones from C(vms).
+    - The virtual machines are handled concurrently, up to C(vcenter_concurrency)
+      at a time, and the result of each of them is returned in C(value). The virtual
+      machines that are already in the expected state are reported as unchanged.
+    - C(reset) is always reported as changed.
+    - An empty list handles no virtual machine and changes nothing.
+    elements: str
+    type: list
 author:
 - Ansible VMware team
 version_added: 1.0.0
@@ -29,39 +101,39 @@ requirements:
 - python >= 3.6
 """
 IN_QUERY_PARAMETER = []
-from ansible.module_utils.basic import env_fallback
+VM_FILTERS = [
+    "filter.clusters",
+    "filter.datacenters",
+    "filter.folders",
+    "filter.hosts",
+    "filter.names",
+    "filter.power_states",
+    "filter.resource_pools",
+]
 
 try:
     from ansible_module.turbo.module import AnsibleTurboModule as AnsibleModule
 except ImportError:
     from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
-    gen_args,
-    open_session,
-    update_changed_flag,
+    connection_argument_spec,
+    find_device,
+    open_session_from_params,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.operations import (
+    operation,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.bulk import (
+    run_on_vms,
 )
 
 
 def prepare_argument_spec():
-    argument_spec = {
-        "vcenter_hostname": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_HOST"])
-        ),
-        "vcenter_username": dict(
-            type="str", required=False, fallback=(env_fallback, ["VMWARE_USER"])
-        ),
-        "vcenter_password": dict(
-            type="str",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_PASSWORD"]),
-        ),
-        "vcenter_certs": dict(
-            type="bool",
-            required=False,
-            no_log=True,
-            fallback=(env_fallback, ["VMWARE_VALIDATE_CERTS"]),
-        ),
+    argument_spec = connection_argument_spec()
+    argument_spec["vms"] = {
+        "type": "list",
+        "elements": "str",
+        "operationIds": ["reset", "start", "stop", "suspend"],
     }
     argument_spec["vm"] = {
         "type": "str",
@@ -71,49 +143,54 @@ def prepare_argument_spec():
         "type": "str",
         "choices": ["reset", "start", "stop", "suspend"],
     }
+    argument_spec["filter.resource_pools"] = {
+        "type": "list",
+        "operationIds": ["reset", "start", "stop", "suspend"],
+    }
+    argument_spec["filter.power_states"] = {
+        "type": "list",
+        "operationIds": ["reset", "start", "stop", "suspend"],
+    }
+    argument_spec["filter.names"] = {
+        "type": "list",
+        "operationIds": ["reset", "start", "stop", "suspend"],
+    }
+    argument_spec["filter.hosts"] = {
+        "type": "list",
+        "operationIds": ["reset", "start", "stop", "suspend"],
+    }
+    argument_spec["filter.folders"] = {
+        "type": "list",
+        "operationIds": ["reset", "start", "stop", "suspend"],
+    }
+    argument_spec["filter.datacenters"] = {
+        "type": "list",
+        "operationIds": ["reset", "start", "stop", "suspend"],
+    }
+    argument_spec["filter.clusters"] = {
+        "type": "list",
+        "operationIds": ["reset", "start", "stop", "suspend"],
+    }
     return argument_spec
 
 
-async def get_device_info(params, session, _url, _key):
-    async with session.get(((_url + "/") + _key)) as resp:
-        _json = await resp.json()
-        entry = _json["value"]
-        entry["_key"] = _key
-        return entry
-
-
-async def list_devices(params, session):
-    existing_entries = []
-    _url = url(params)
-    async with session.get(_url) as resp:
-        _json = await resp.json()
-        devices = _json["value"]
-    for device in devices:
-        _id = list(device.values())[0]
-        existing_entries.append((await get_device_info(params, session, _url, _id)))
-    return existing_entries
-
-
 async def exists(params, session):
-    unicity_keys = ["bus", "pci_slot_number"]
-    devices = await list_devices(params, session)
-    for device in devices:
-        for k in unicity_keys:
-            if (params.get(k) is not None) and (device.get(k) != params.get(k)):
-                break
-        else:
-            return device
+    unicity_keys = []
+    return await find_device(
+        session,
+        url(params),
+        params,
+        unicity_keys,
+        concurrency=params["vcenter_concurrency"],
+    )
 
 
 async def main():
     module_args = prepare_argument_spec()
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
-    session = await open_session(
-        vcenter_hostname=module.params["vcenter_hostname"],
-        vcenter_username=module.params["vcenter_username"],
-        vcenter_password=module.params["vcenter_password"],
-    )
+    session = await open_session_from_params(module.params)
     result = await entry_point(module, session)
+    result.setdefault("_debug_info", {}).update(session.debug_info)
     module.exit_json(**result)
 
 
@@ -121,61 +198,33 @@ def url(params):
     return "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power".format(**params)
 
 
+OPERATIONS = {
+    "reset": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/reset",
+        "changes": True,
+    },
+    "start": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/start",
+        "changes": True,
+    },
+    "stop": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/stop",
+        "changes": True,
+    },
+    "suspend": {
+        "method": "post",
+        "url": "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/suspend",
+        "changes": True,
+    },
+}
+
+
 async def entry_point(module, session):
-    func = globals()[("_" + module.params["state"])]
-    return await func(module.params, session)
-
-
-async def _reset(params, session):
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/reset".format(
-        **params
-    ) + gen_args(params, IN_QUERY_PARAMETER)
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "reset")
-
-
-async def _start(params, session):
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/start".format(
-        **params
-    ) + gen_args(params, IN_QUERY_PARAMETER)
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "start")
-
-
-async def _stop(params, session):
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/stop".format(
-        **params
-    ) + gen_args(params, IN_QUERY_PARAMETER)
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "stop")
-
-
-async def _suspend(params, session):
-    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}/power/suspend".format(
-        **params
-    ) + gen_args(params, IN_QUERY_PARAMETER)
-    async with session.post(_url) as resp:
-        try:
-            if resp.headers["Content-Type"] == "application/json":
-                _json = await resp.json()
-        except KeyError:
-            _json = {}
-        return await update_changed_flag(_json, resp.status, "suspend")
+    func = operation(OPERATIONS, module.params["state"], IN_QUERY_PARAMETER, exists)
+    return await run_on_vms(func, module.params, session, VM_FILTERS)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Check run_bulk() and run_on_vms() against the mock vCenter.
+
+Each item fetches the details of a virtual machine. The results come back
+in the order of the items, a failed item does not stop the other ones, and
+the mock never serves more requests at once than the concurrency.
+"""
+
+import asyncio
+import tempfile
+
+import aiohttp
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    open_session,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.bulk import (
+    run_bulk,
+    run_on_vms,
+)
+
+
+async def get_vm(params, session):
+    if params["vm"] == "vm-broken":
+        raise aiohttp.ClientConnectionError("connection lost")
+    _url = "https://{vcenter_hostname}/rest/vcenter/vm/{vm}".format(**params)
+    async with session.get(_url) as resp:
+        if resp.status != 200:
+            return {"failed": True, "status": resp.status}
+        _json = await resp.json()
+    return {"value": _json["value"], "changed": params["vm"] == "vm-0"}
+
+
+async def check(cert, key):
+    mock = MockVCenter(vms=30, latency=0.01)
+    await mock.start(cert, key)
+    session = await open_session(
+        vcenter_hostname=mock.hostname,
+        vcenter_username="user",
+        vcenter_password="password",
+        validate_certs=False,
+    )
+    params = {
+        "vcenter_hostname": mock.hostname,
+        "vm": None,
+        "vms": None,
+        "vcenter_concurrency": 4,
+    }
+    try:
+        # The results keep the order of the items, the concurrency is bounded
+        vms = ["vm-{}".format(i) for i in reversed(range(30))]
+        mock.reset_stats()
+        result = await run_bulk(get_vm, params, [{"vm": i} for i in vms], session, 4)
+        assert [i["value"]["vm"] for i in result["value"]] == vms
+        assert result["changed"] and not result["failed"]
+        assert 1 < mock.peak <= 4, mock.peak
+
+        # The failed items are reported in place, the other ones still run
+        items = [{"vm": "vm-1"}, {"vm": "vm-404"}, {"vm": "vm-broken"}]
+        items += [{"vm": "vm-2", "unknown": True}, {"vm": "vm-3"}]
+        result = await run_bulk(get_vm, params, items, session)
+        value = result["value"]
+        assert result["failed"] and not result["changed"]
+        assert value[0]["value"]["vm"] == "vm-1" and value[4]["value"]["vm"] == "vm-3"
+        assert value[1] == {"failed": True, "status": 404}
+        assert value[2] == {"failed": True, "msg": "connection lost"}
+        assert value[3]["failed"] and "unknown" in value[3]["msg"]
+
+        # run_on_vms() adds the vm of each result, and does nothing on []
+        result = await run_on_vms(
+            get_vm, dict(params, vms=["vm-0", "vm-5"]), session, []
+        )
+        assert [i["vm"] for i in result["value"]] == ["vm-0", "vm-5"]
+        assert result["changed"]
+        mock.reset_stats()
+        result = await run_on_vms(get_vm, dict(params, vms=[]), session, [])
+        assert result["value"] == [] and not result["changed"]
+        assert mock.requests == 0
+    finally:
+        await session.close()
+        await mock.stop()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        asyncio.get_event_loop().run_until_complete(check(cert, key))
+    print("run_bulk() keeps the order, bounds the concurrency and isolates failures")
+
+
+if __name__ == "__main__":
+    main()
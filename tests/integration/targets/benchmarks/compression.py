@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Check the decompression of the responses, and report the transfer ratio.
+
+The mock vCenter answers with gzip, deflate (zlib), raw deflate (deflate
+without the zlib header, like some proxies send it) and without any
+compression. list_devices() parses the list response while it is received
+and reads the details of the virtual machines whole, the result must be
+the same with each encoding.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    list_devices,
+    open_session,
+)
+
+ENCODINGS = [None, "gzip", "deflate", "raw-deflate"]
+
+
+async def measure(args, cert, key):
+    mock = MockVCenter(vms=args.vms, latency=0)
+    await mock.start(cert, key)
+    _url = "https://{}/rest/vcenter/vm".format(mock.hostname)
+    results = []
+    try:
+        for encoding in ENCODINGS:
+            mock.encoding = encoding
+            # A new session per encoding, for its own transfer stats
+            open_session.cache_clear()
+            session = await open_session(
+                vcenter_hostname=mock.hostname,
+                vcenter_username="user",
+                vcenter_password="password",
+                validate_certs=False,
+            )
+            try:
+                devices = await list_devices(session, _url)
+            finally:
+                await session.close()
+            stats = session.debug_info["session"]
+            results.append((encoding, devices, stats["transfer"]))
+    finally:
+        await mock.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--vms", type=int, default=1000, help="number of virtual machines"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        results = asyncio.get_event_loop().run_until_complete(measure(args, cert, key))
+
+    print(
+        "{:>12} {:>10} {:>10} {:>6}".format("encoding", "received", "decoded", "ratio")
+    )
+    expected = results[0][1]
+    failed = False
+    for encoding, devices, transfer in results:
+        print(
+            "{:>12} {:>10} {:>10} {:>6}".format(
+                encoding or "identity",
+                transfer["received"],
+                transfer["decoded"],
+                transfer["ratio"],
+            )
+        )
+        if devices != expected:
+            print("{}: the virtual machines differ".format(encoding))
+            failed = True
+        elif encoding and transfer["received"] >= transfer["decoded"]:
+            print("{}: the responses were not compressed".format(encoding))
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
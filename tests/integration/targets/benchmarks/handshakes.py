@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Measure the TLS handshakes that the connection keep-alive saves.
+
+The details of the virtual machines of the mock vCenter are fetched with
+list_devices(), on a session that closes its connections after each
+request (keep-alive 0), then on a session with the default keep-alive.
+The mock counts the TLS connections it accepts, one per handshake.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    list_devices,
+    open_session,
+)
+
+
+async def measure(args, cert, key):
+    mock = MockVCenter(vms=args.vms, latency=args.latency)
+    await mock.start(cert, key)
+    _url = "https://{}/rest/vcenter/vm".format(mock.hostname)
+    results = []
+    try:
+        for keepalive_timeout in [0, DEFAULT_KEEPALIVE_TIMEOUT]:
+            session = await open_session(
+                vcenter_hostname=mock.hostname,
+                vcenter_username="user",
+                vcenter_password="password",
+                validate_certs=False,
+                pool_size=args.pool_size,
+                keepalive_timeout=keepalive_timeout,
+            )
+            mock.reset_stats()
+            start = time.perf_counter()
+            try:
+                for _ in range(args.rounds):
+                    devices = await list_devices(session, _url)
+                    assert len(devices) == args.vms
+            finally:
+                await session.close()
+            elapsed = time.perf_counter() - start
+            results.append(
+                (keepalive_timeout, mock.requests, len(mock.connections), elapsed)
+            )
+    finally:
+        await mock.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--vms", type=int, default=100, help="number of virtual machines"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=3, help="number of list_devices() calls"
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=20, help="size of the connection pool"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.005, help="latency of the mock, in seconds"
+    )
+    parser.add_argument(
+        "--min-ratio",
+        type=float,
+        help="minimum ratio of the handshakes saved by the keep-alive",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        results = asyncio.get_event_loop().run_until_complete(measure(args, cert, key))
+
+    print(
+        "{:>10} {:>9} {:>11} {:>9}".format(
+            "keep-alive", "requests", "handshakes", "time"
+        )
+    )
+    for keepalive_timeout, requests, handshakes, elapsed in results:
+        print(
+            "{:>9}s {:>9} {:>11} {:>8.3f}s".format(
+                keepalive_timeout, requests, handshakes, elapsed
+            )
+        )
+    closed, kept = results[0][2], results[-1][2]
+    print("The keep-alive saves {:.1f}x the handshakes".format(closed / kept))
+    if args.min_ratio and closed / kept < args.min_ratio:
+        print(
+            "The keep-alive saves less than {}x the handshakes".format(args.min_ratio)
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Compare the decode time and the peak memory of the JSON codecs.
+
+Each codec that json_codec() can pick (json, and orjson or ujson when they
+are installed) decodes the same payloads. By default, the payloads are the
+responses of the mock vCenter for a large vcenter_vm_info call and a list
+of metrics; recorded vCenter responses can be given with --payload instead.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from mock_vcenter import vm_details
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    json_codec,
+)
+
+CODECS = ["json", "orjson", "ujson"]
+
+
+def generated_payloads(vms):
+    metrics = [
+        {
+            "cid": "cpu.util.VM",
+            "rid": "vm-{}".format(i % vms),
+            "ts": [1600000000 + 20 * t for t in range(180)],
+            "val": [(i * t) % 100 for t in range(180)],
+        }
+        for i in range(vms)
+    ]
+    return {
+        "vcenter_vm_info": json.dumps({"value": [vm_details(i) for i in range(vms)]}),
+        "stats_data_dp": json.dumps({"value": {"data_points": metrics}}),
+    }
+
+
+def recorded_payloads(paths):
+    payloads = {}
+    for path in paths:
+        with open(path) as fd:
+            payloads[path] = fd.read()
+    return payloads
+
+
+def measure(loads, payload, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loads(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    loads(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--vms", type=int, default=5000, help="size of the generated payloads"
+    )
+    parser.add_argument(
+        "--payload",
+        action="append",
+        default=[],
+        help="file that holds a recorded vCenter response, can be repeated",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="the best of repeat decodes is kept"
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        help="maximum decode time of the default codec, relative to json",
+    )
+    args = parser.parse_args()
+
+    if args.payload:
+        payloads = recorded_payloads(args.payload)
+    else:
+        payloads = generated_payloads(args.vms)
+    # json_codec() falls back to json for the codecs that are not installed
+    codecs = [json_codec(i) for i in CODECS]
+    codecs = [i for name, i in zip(CODECS, codecs) if i[0] == name]
+    default = json_codec()[0]
+
+    print(
+        "{:<20} {:>8} {:>8} {:>10} {:>10}".format(
+            "payload", "size", "codec", "decode", "peak"
+        )
+    )
+    failed = False
+    for name, payload in payloads.items():
+        elapsed = {}
+        for codec, loads, _ in codecs:
+            elapsed[codec], peak = measure(loads, payload, args.repeat)
+            print(
+                "{:<20} {:>7.1f}M {:>8} {:>8.1f}ms {:>9.1f}M".format(
+                    name[-20:],
+                    len(payload) / 2**20,
+                    codec,
+                    elapsed[codec] * 1000,
+                    peak / 2**20,
+                )
+            )
+        if args.max_slowdown and elapsed[default] > elapsed["json"] * args.max_slowdown:
+            print("{}: {} is slower than json".format(name, default))
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""Measure how list_devices() scales with the size of the collection.
+
+The virtual machines of the mock vCenter are listed, then their details are
+fetched one at a time (concurrency 1), and with the default fan-out. Each
+request of the mock waits for --latency seconds, like a remote vCenter.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    DEFAULT_CONCURRENCY,
+    list_devices,
+    open_session,
+)
+
+
+async def measure(args, cert, key):
+    mock = MockVCenter(latency=args.latency)
+    await mock.start(cert, key)
+    session = await open_session(
+        vcenter_hostname=mock.hostname,
+        vcenter_username="user",
+        vcenter_password="password",
+        validate_certs=False,
+    )
+    _url = "https://{}/rest/vcenter/vm".format(mock.hostname)
+    results = []
+    try:
+        for size in args.sizes:
+            mock.vms = size
+            elapsed = {}
+            for concurrency in [1, DEFAULT_CONCURRENCY]:
+                start = time.perf_counter()
+                devices = await list_devices(session, _url, concurrency=concurrency)
+                elapsed[concurrency] = time.perf_counter() - start
+                assert len(devices) == size
+            results.append((size, elapsed[1], elapsed[DEFAULT_CONCURRENCY]))
+    finally:
+        await session.close()
+        await mock.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="number of virtual machines",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.005, help="latency of the mock, in seconds"
+    )
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        help="minimum speedup of the fan-out on the largest collection",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        results = asyncio.get_event_loop().run_until_complete(measure(args, cert, key))
+
+    print("{:>8} {:>12} {:>12} {:>8}".format("vms", "sequential", "fan-out", "speedup"))
+    for size, sequential, concurrent in results:
+        print(
+            "{:>8} {:>11.3f}s {:>11.3f}s {:>7.1f}x".format(
+                size, sequential, concurrent, sequential / concurrent
+            )
+        )
+    size, sequential, concurrent = results[-1]
+    if args.min_speedup and sequential / concurrent < args.min_speedup:
+        print("The fan-out is less than {}x faster".format(args.min_speedup))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
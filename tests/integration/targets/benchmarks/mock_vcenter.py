@@ -0,0 +1,232 @@
+"""A local mock of the vCenter REST API, for the benchmarks.
+
+It serves a session, a list of virtual machines and their details over TLS,
+with a self-signed certificate. Each request waits for the configured
+latency, like a remote vCenter would. The server counts the requests, the
+TLS connections it accepts and the peak of the requests it serves at once.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import os
+import ssl
+import subprocess
+import sys
+import zlib
+
+from aiohttp import web
+
+COLLECTION_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")
+)
+
+
+def collections_path():
+    """Return the directory that holds ansible_collections/vmware/vmware_rest."""
+    namespace_dir = os.path.dirname(COLLECTION_DIR)
+    root = os.path.dirname(namespace_dir)
+    if os.path.basename(root) == "ansible_collections":
+        return os.path.dirname(root)
+    return os.environ.get("ANSIBLE_COLLECTIONS_PATH", "").split(os.pathsep)[0]
+
+
+sys.path.insert(0, collections_path())
+
+
+def make_certificate(directory):
+    """Create a self-signed certificate for localhost, return its paths."""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return cert, key
+
+
+def vm_summary(i):
+    return {
+        "vm": "vm-{}".format(i),
+        "name": "test_vm{}".format(i),
+        "power_state": "POWERED_ON" if i % 2 else "POWERED_OFF",
+        "cpu_count": 2,
+        "memory_size_MiB": 4096,
+    }
+
+
+def vm_details(i):
+    details = vm_summary(i)
+    details.update(
+        {
+            "guest_OS": "DEBIAN_10_64",
+            "boot": {"type": "BIOS", "delay": 0, "enter_setup_mode": False},
+            "disks": [
+                {
+                    "key": str(2000 + d),
+                    "value": {
+                        "label": "Hard disk {}".format(d + 1),
+                        "type": "SCSI",
+                        "capacity": 17179869184,
+                        "backing": {
+                            "type": "VMDK_FILE",
+                            "vmdk_file": "[datastore1] test_vm{0}/test_vm{0}_{1}.vmdk".format(
+                                i, d
+                            ),
+                        },
+                    },
+                }
+                for d in range(2)
+            ],
+            "nics": [
+                {
+                    "key": "4000",
+                    "value": {
+                        "label": "Network adapter 1",
+                        "type": "VMXNET3",
+                        "mac_address": "00:50:56:00:{:02x}:{:02x}".format(
+                            i // 256 % 256, i % 256
+                        ),
+                        "state": "CONNECTED",
+                    },
+                }
+            ],
+        }
+    )
+    return details
+
+
+def encode(request, body, encoding):
+    """Compress body with encoding if the client accepts it."""
+    accepted = request.headers.get("Accept-Encoding", "")
+    headers = {"Content-Type": "application/json"}
+    if encoding and encoding.split("-")[-1] in accepted:
+        if encoding == "gzip":
+            body = gzip.compress(body)
+        elif encoding == "deflate":
+            body = zlib.compress(body)
+        elif encoding == "raw-deflate":
+            # What some servers send as deflate, without the zlib header
+            compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+        headers["Content-Encoding"] = encoding.split("-")[-1]
+    return web.Response(body=body, headers=headers)
+
+
+class MockVCenter(object):
+    """The mock server, its settings can be changed while it runs."""
+
+    def __init__(self, vms=100, latency=0.005, encoding=None):
+        self.vms = vms
+        self.latency = latency
+        self.encoding = encoding
+        self.password = "password"
+        self.logins = 0
+        self.requests = 0
+        self.connections = set()
+        self.active = 0
+        self.peak = 0
+        self.failures = []
+        self.deleted = set()
+        self.runner = None
+        self.port = None
+
+    @property
+    def hostname(self):
+        return "localhost:{}".format(self.port)
+
+    def reset_stats(self):
+        self.requests = 0
+        self.connections = set()
+        self.peak = 0
+
+    async def reply(self, request, value):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.active -= 1
+        body = json.dumps({"value": value}).encode()
+        return encode(request, body, self.encoding)
+
+    async def login(self, request):
+        auth = request.headers.get("Authorization", "").split(" ")[-1]
+        password = base64.b64decode(auth).decode().partition(":")[2]
+        if password != self.password:
+            raise web.HTTPUnauthorized()
+        self.logins += 1
+        return await self.reply(request, "mock-session-{}".format(self.logins))
+
+    async def list_vms(self, request):
+        return await self.reply(request, [vm_summary(i) for i in range(self.vms)])
+
+    async def get_vm(self, request):
+        i = int(request.match_info["vm"].split("-")[-1])
+        if i >= self.vms or i in self.deleted:
+            raise web.HTTPNotFound()
+        return await self.reply(request, vm_details(i))
+
+    async def delete_vm(self, request):
+        i = int(request.match_info["vm"].split("-")[-1])
+        if i >= self.vms or i in self.deleted:
+            raise web.HTTPNotFound()
+        self.deleted.add(i)
+        await self.reply(request, None)
+        return web.Response(status=204)
+
+    @web.middleware
+    async def inject_failures(self, request, handler):
+        """Count the request, answer it with the first of the queued failures.
+
+        Each failure is a (status, headers, processed) tuple, a processed
+        request is handled before the failure is returned, like behind a
+        gateway that times out.
+        """
+        self.requests += 1
+        if not self.failures or request.path == "/rest/com/vmware/cis/session":
+            return await handler(request)
+        status, headers, processed = self.failures.pop(0)
+        if processed:
+            try:
+                await handler(request)
+            except web.HTTPException:
+                pass
+        return web.Response(status=status, headers=headers)
+
+    async def start(self, cert, key):
+        app = web.Application(middlewares=[self.inject_failures])
+        app.router.add_post("/rest/com/vmware/cis/session", self.login)
+        app.router.add_get("/rest/vcenter/vm", self.list_vms)
+        app.router.add_get("/rest/vcenter/vm/{vm}", self.get_vm)
+        app.router.add_delete("/rest/vcenter/vm/{vm}", self.delete_vm)
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "localhost", 0, ssl_context=context)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
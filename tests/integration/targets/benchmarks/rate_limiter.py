@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Check that concurrent requests share the rate limit without blocking.
+
+Many coroutines call RateLimiter.acquire() at once, on one limiter and on
+two limiters that share the same bucket file like two sessions of a
+process do. They must all get their token before the timeout, and the
+details of the virtual machines of the mock vCenter are fetched at the
+configured rate.
+"""
+
+import asyncio
+import tempfile
+import time
+
+import aiohttp
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    ClientResponse,
+    RestSession,
+    RateLimiter,
+    list_devices,
+)
+
+RATE = 100
+BURST = 10
+
+
+async def check(cert, key, cache_dir):
+    limiter = RateLimiter("localhost", RATE, burst=BURST, cache_dir=cache_dir)
+    other = RateLimiter("localhost", RATE, burst=BURST, cache_dir=cache_dir)
+    start = time.perf_counter()
+    calls = [limiter.acquire() for _ in range(30)] + [
+        other.acquire() for _ in range(30)
+    ]
+    await asyncio.wait_for(asyncio.gather(*calls), timeout=10)
+    elapsed = time.perf_counter() - start
+    # The burst is free, the other tokens come at the rate
+    assert elapsed >= (60 - BURST) / RATE * 0.9, elapsed
+    assert limiter.waited and other.waited
+
+    mock = MockVCenter(vms=40, latency=0)
+    await mock.start(cert, key)
+    limiter = RateLimiter(mock.hostname, RATE, burst=BURST, cache_dir=cache_dir)
+    client = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(ssl=False),
+        response_class=ClientResponse,
+        auto_decompress=False,
+    )
+    session = RestSession(client, mock.hostname, "user", "password", limiter=limiter)
+    try:
+        start = time.perf_counter()
+        await session.authenticate()
+        _url = "https://{}/rest/vcenter/vm".format(mock.hostname)
+        devices = await asyncio.wait_for(list_devices(session, _url), timeout=10)
+        elapsed = time.perf_counter() - start
+        assert len(devices) == 40
+        assert elapsed >= (mock.requests + 1 - BURST) / RATE * 0.9, elapsed
+    finally:
+        await client.close()
+        await mock.stop()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        asyncio.get_event_loop().run_until_complete(check(cert, key, tmp_dir))
+    print("The concurrent requests share the rate limit")
+
+
+if __name__ == "__main__":
+    main()
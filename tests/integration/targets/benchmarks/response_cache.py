@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""Check the response caches of the _info modules against the mock vCenter.
+
+A cached GET is served from the memory cache, then from the disk cache by
+a new session like the next module of a play, without a request to the
+mock. The errors are not cached, the entries expire, and both caches drop
+their least recently used entries when they grow over their size.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    open_session,
+)
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.response_cache import (
+    MEMORY_RESPONSE_CACHE,
+    DiskResponseCache,
+    ResponseCache,
+    cached_get,
+)
+
+
+def entry(body, ttl=60):
+    return {
+        "status": 200,
+        "content_type": "application/json",
+        "body": body,
+        "expires": time.time() + ttl,
+    }
+
+
+def check_stores(cache_dir):
+    memory = ResponseCache(max_size=10)
+    memory.set("a", entry(b"12345"))
+    memory.set("b", entry(b"12345"))
+    assert memory.get("a")
+    # c evicts b, the least recently used
+    memory.set("c", entry(b"12345"))
+    assert memory.get("a") and memory.get("c") and not memory.get("b")
+    assert memory.size == 10
+    # An expired entry is dropped when it is read
+    memory.set("d", entry(b"", ttl=-1))
+    assert not memory.get("d") and "d" not in memory.entries
+
+    disk = DiskResponseCache(cache_dir=cache_dir, max_size=200)
+    disk.set("a", entry(b"x" * 5))
+    assert disk.get("a")["body"] == b"x" * 5
+    disk.set("b", entry(b"y" * 5, ttl=-1))
+    assert disk.get("b") is None
+    # The files also hold a header line of about 80 bytes, a large entry
+    # evicts the older ones
+    os.utime(disk.path("a"), (0, 0))
+    disk.set("c", entry(b"z" * 100))
+    assert disk.get("a") is None and disk.get("c")["body"] == b"z" * 100
+
+
+async def get_vms(mock, cache, disk_cache, username="user"):
+    # A new session each time, like the modules of a play
+    open_session.cache_clear()
+    session = await open_session(
+        vcenter_hostname=mock.hostname,
+        vcenter_username=username,
+        vcenter_password="password",
+        validate_certs=False,
+    )
+    session.disk_cache = disk_cache
+    _url = "https://{}/rest/vcenter/vm".format(mock.hostname)
+    try:
+        results = []
+        for vm in ["vm-1", "vm-99"]:
+            async with cached_get(session, _url + "/" + vm, cache) as resp:
+                results.append((resp.status, await resp.read()))
+    finally:
+        await session.close()
+    return session, results
+
+
+async def check(cert, key, cache_dir):
+    mock = MockVCenter(vms=10, latency=0)
+    await mock.start(cert, key)
+    disk_cache = DiskResponseCache(cache_dir=cache_dir)
+    try:
+        mock.reset_stats()
+        session, first = await get_vms(mock, "memory", None)
+        assert session.cache_stats == {"hits": 0, "misses": 2}
+        assert first[0][0] == 200 and first[1][0] == 404
+        session, second = await get_vms(mock, "memory", None)
+        # vm-1 comes from the cache, the 404 of vm-99 was not cached
+        assert session.cache_stats == {"hits": 1, "misses": 1}
+        assert second == first
+        # Two logins, and the three GETs that were not cached
+        assert mock.requests == 5
+
+        # The next module process starts with an empty memory cache
+        MEMORY_RESPONSE_CACHE.entries.clear()
+        MEMORY_RESPONSE_CACHE.size = 0
+        session, _ = await get_vms(mock, "disk", disk_cache)
+        assert session.cache_stats == {"hits": 0, "misses": 2}
+        MEMORY_RESPONSE_CACHE.entries.clear()
+        MEMORY_RESPONSE_CACHE.size = 0
+        requests = mock.requests
+        session, third = await get_vms(mock, "disk", disk_cache)
+        assert session.cache_stats == {"hits": 1, "misses": 1} and third == first
+        assert mock.requests == requests + 2
+
+        # The entries are not shared between the users
+        session, _ = await get_vms(mock, "memory", None, username="other")
+        assert session.cache_stats["hits"] == 0
+    finally:
+        await mock.stop()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        cache_dir = os.path.join(tmp_dir, "responses")
+        check_stores(os.path.join(tmp_dir, "stores"))
+        asyncio.get_event_loop().run_until_complete(check(cert, key, cache_dir))
+    print("The responses are served from the caches")
+
+
+if __name__ == "__main__":
+    main()
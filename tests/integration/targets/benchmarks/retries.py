@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Check the retries of the requests against the mock vCenter.
+
+The mock answers the next requests with the queued failures. A GET is
+retried after a 429, 502, 503 or 504 and waits for the Retry-After delay,
+a POST is only retried if vCenter did not process it, and a DELETE that was
+processed before the gateway failed is a success even if its retry gets a
+404.
+"""
+
+import asyncio
+import tempfile
+import time
+
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    RETRY_ATTEMPTS,
+    open_session,
+)
+
+
+async def status(session, method, _url):
+    async with session.request(method, _url) as resp:
+        return resp.status
+
+
+async def check(cert, key):
+    mock = MockVCenter(vms=10, latency=0)
+    await mock.start(cert, key)
+    session = await open_session(
+        vcenter_hostname=mock.hostname,
+        vcenter_username="user",
+        vcenter_password="password",
+        validate_certs=False,
+    )
+    _url = "https://{}/rest/vcenter/vm".format(mock.hostname)
+    try:
+        # Retry-After is honored
+        mock.failures = [(503, {"Retry-After": "1"}, False), (429, {}, False)]
+        start = time.perf_counter()
+        assert await status(session, "GET", _url + "/vm-1") == 200
+        assert time.perf_counter() - start >= 1
+        assert session.retries == 2 and not mock.failures
+
+        # The attempts are bounded
+        mock.failures = [(504, {"Retry-After": "0"}, True)] * RETRY_ATTEMPTS
+        assert await status(session, "GET", _url + "/vm-1") == 504
+        assert session.retries == 2 + RETRY_ATTEMPTS - 1 and not mock.failures
+
+        # A POST that vCenter may have processed is not sent again
+        retries = session.retries
+        mock.failures = [(502, {}, False)]
+        assert await status(session, "POST", _url) == 502
+        assert session.retries == retries
+        mock.failures = [(503, {"Retry-After": "0"}, False)]
+        assert await status(session, "POST", _url) == 405
+        assert session.retries == retries + 1
+
+        # The retry of a processed DELETE finds the VM gone, it is a success
+        mock.failures = [(504, {"Retry-After": "0"}, True)]
+        assert await status(session, "DELETE", _url + "/vm-2") == 204
+        assert 2 in mock.deleted and not mock.failures
+        # A DELETE that was not processed keeps its 404
+        mock.failures = [(503, {"Retry-After": "0"}, False)]
+        assert await status(session, "DELETE", _url + "/vm-2") == 404
+        assert await status(session, "DELETE", _url + "/vm-3") == 204
+        assert await status(session, "DELETE", _url + "/vm-3") == 404
+    finally:
+        await session.close()
+        await mock.stop()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        asyncio.get_event_loop().run_until_complete(check(cert, key))
+    print("The failed requests are retried when it is safe")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env bash
+set -eux
+
+# The benchmarks run against a local mock vCenter, see mock_vcenter.py.
+
+# list_devices() with a sequential and a concurrent fan-out, by collection size
+python list_devices.py --min-speedup "${LIST_DEVICES_MIN_SPEEDUP:-2}"
+
+# The TLS handshakes saved by the connection keep-alive
+python handshakes.py --min-ratio "${HANDSHAKES_MIN_RATIO:-5}"
+
+# The decode time and the peak memory of the JSON codecs on large payloads
+python json_codecs.py --max-slowdown "${JSON_CODECS_MAX_SLOWDOWN:-1.2}"
+
+# The decompression of the gzip, deflate and raw deflate responses
+python compression.py
+
+# The stored sessions are only reused with the password they were opened with
+python session_store.py
+
+# The order, the concurrency and the failures of the bulk operations
+python bulk.py
+
+# The retries of the failed requests, and the Retry-After delays
+python retries.py
+
+# The concurrent requests share the rate limit without blocking each other
+python rate_limiter.py
+
+# The identical concurrent GETs of a session share one request
+python single_flight.py
+
+# The GET responses served from the memory and the disk caches
+python response_cache.py
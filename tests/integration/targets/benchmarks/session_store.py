@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Check that a stored session is only reused with the password it was opened with.
+
+The sessions of the mock vCenter are stored in a temporary SessionStore. A
+second session with the same password reuses the stored session ID, after
+a password change the stored session is dropped and a new login is done.
+"""
+
+import asyncio
+import json
+import tempfile
+
+import aiohttp
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    ClientResponse,
+    RestSession,
+    SessionStore,
+)
+
+
+async def authenticate(mock, password, cache_dir):
+    store = SessionStore(mock.hostname, "user", password, cache_dir=cache_dir)
+    client = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(ssl=False),
+        response_class=ClientResponse,
+        auto_decompress=False,
+    )
+    session = RestSession(client, mock.hostname, "user", password, store=store)
+    try:
+        await session.authenticate()
+    finally:
+        await client.close()
+    return session, store
+
+
+async def check(cert, key, cache_dir):
+    mock = MockVCenter(latency=0)
+    await mock.start(cert, key)
+    try:
+        first, store = await authenticate(mock, "password", cache_dir)
+        assert not first.reused and mock.logins == 1
+
+        # Same password, the stored session is reused without a login
+        second, _ = await authenticate(mock, "password", cache_dir)
+        assert second.reused and second.session_id == first.session_id
+        assert mock.logins == 1
+        with open(store.path) as fd:
+            entry = json.load(fd)
+        assert "password" not in json.dumps(entry)
+
+        # A wrong password goes to vCenter, the stored session must not hide
+        # it
+        try:
+            await authenticate(mock, "wrong", cache_dir)
+        except Exception:
+            pass
+        else:
+            raise AssertionError("the session was reused with a wrong password")
+
+        # The new password after a rotation logs in again
+        mock.password = "rotated"
+        third, _ = await authenticate(mock, "rotated", cache_dir)
+        assert not third.reused and third.session_id != first.session_id
+        assert mock.logins == 2
+        fourth, _ = await authenticate(mock, "rotated", cache_dir)
+        assert fourth.reused and fourth.session_id == third.session_id
+    finally:
+        await mock.stop()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        asyncio.get_event_loop().run_until_complete(check(cert, key, tmp_dir))
+    print("The stored sessions are bound to the password")
+
+
+if __name__ == "__main__":
+    main()
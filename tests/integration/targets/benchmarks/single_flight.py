@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Check that the identical concurrent GETs of a session share one request.
+
+The mock vCenter counts the requests it serves. The concurrent GETs of the
+same URL must reach it once and all get the same body, a cancelled caller
+must not cancel the request of the other ones, and the next GET after the
+shared one is done is a new request.
+"""
+
+import asyncio
+import json
+import tempfile
+
+from mock_vcenter import MockVCenter, make_certificate
+
+from ansible_collections.vmware.vmware_rest.plugins.module_utils.vmware_rest import (
+    open_session,
+)
+
+
+async def get(session, _url):
+    async with session.get(_url) as resp:
+        return (
+            resp.status,
+            json.loads(await resp.read()) if resp.status == 200 else None,
+        )
+
+
+async def check(cert, key):
+    mock = MockVCenter(vms=10, latency=0.05)
+    await mock.start(cert, key)
+    session = await open_session(
+        vcenter_hostname=mock.hostname,
+        vcenter_username="user",
+        vcenter_password="password",
+        validate_certs=False,
+    )
+    _url = "https://{}/rest/vcenter/vm".format(mock.hostname)
+    try:
+        mock.reset_stats()
+        results = await asyncio.gather(
+            *[get(session, _url + "/vm-1") for _ in range(20)]
+        )
+        assert mock.requests == 1 and session.coalesced == 19
+        assert all(i == results[0] for i in results)
+        assert results[0][0] == 200 and results[0][1]["value"]["vm"] == "vm-1"
+
+        # Each URL gets its own request
+        mock.reset_stats()
+        await asyncio.gather(
+            *[get(session, _url + "/vm-{}".format(i % 2)) for i in range(10)]
+        )
+        assert mock.requests == 2
+
+        # A failed request is shared as well, the next GET sends a new one
+        mock.reset_stats()
+        results = await asyncio.gather(
+            *[get(session, _url + "/vm-99") for _ in range(5)]
+        )
+        assert [i[0] for i in results] == [404] * 5 and mock.requests == 1
+        await get(session, _url + "/vm-99")
+        assert mock.requests == 2
+
+        # The cancellation of a caller does not cancel the shared request
+        mock.reset_stats()
+        first = asyncio.ensure_future(get(session, _url + "/vm-3"))
+        second = asyncio.ensure_future(get(session, _url + "/vm-3"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        status, _json = await second
+        assert status == 200 and _json["value"]["vm"] == "vm-3"
+        assert first.cancelled() and mock.requests == 1
+    finally:
+        await session.close()
+        await mock.stop()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert, key = make_certificate(tmp_dir)
+        asyncio.get_event_loop().run_until_complete(check(cert, key))
+    print("The identical concurrent GETs share one request")
+
+
+if __name__ == "__main__":
+    main()
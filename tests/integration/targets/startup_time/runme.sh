@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+set -eux
+
+# The time a module takes to start, before it sends its first request.
+# Fails if the median is above STARTUP_TIME_THRESHOLD milliseconds.
+exec python startup_time.py --threshold "${STARTUP_TIME_THRESHOLD:-500}" "$@"
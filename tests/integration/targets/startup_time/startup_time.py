@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""Measure the time the modules take to start.
+
+Each module is started in a new interpreter, like AnsiballZ does, and the
+following phases are timed:
+
+- basic: import of ansible.module_utils.basic
+- import: import of the module and of the module_utils
+- argspec: prepare_argument_spec()
+- module: construction of the AnsibleModule, i.e. the argument validation
+- session: open_session(), with the login, when VMWARE_HOST is set
+
+The sum of the import, argspec and module phases is the startup time of the
+collection, it is compared with --threshold.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+COLLECTION_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")
+)
+
+DEFAULT_MODULES = [
+    "cis_tagging_category",
+    "content_library_item_info",
+    "vcenter_vm",
+    "vcenter_vm_info",
+    "vcenter_vm_power",
+]
+
+PHASES = ["basic", "import", "argspec", "module", "session"]
+
+MEASURE = """
+import json, os, sys, time
+t0 = time.perf_counter()
+import ansible.module_utils.basic
+t1 = time.perf_counter()
+import importlib
+m = importlib.import_module(
+    "ansible_collections.vmware.vmware_rest.plugins.modules." + sys.argv[2]
+)
+t2 = time.perf_counter()
+argument_spec = m.prepare_argument_spec()
+t3 = time.perf_counter()
+try:
+    m.AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+except SystemExit:
+    # A required parameter is missing, the validation ran anyway
+    pass
+t4 = time.perf_counter()
+t5 = t4
+if os.environ.get("VMWARE_HOST"):
+    import asyncio
+    loop = asyncio.get_event_loop()
+    session = loop.run_until_complete(
+        m.open_session(
+            vcenter_hostname=os.environ["VMWARE_HOST"],
+            vcenter_username=os.environ.get("VMWARE_USER"),
+            vcenter_password=os.environ.get("VMWARE_PASSWORD"),
+            validate_certs=os.environ.get("VMWARE_VALIDATE_CERTS") != "no",
+        )
+    )
+    t5 = time.perf_counter()
+    loop.run_until_complete(session.close())
+sys.stderr.write(
+    "STARTUP_TIME "
+    + json.dumps(
+        {
+            "basic": t1 - t0,
+            "import": t2 - t1,
+            "argspec": t3 - t2,
+            "module": t4 - t3,
+            "session": t5 - t4,
+        }
+    )
+    + "\\n"
+)
+"""
+
+
+def collections_path():
+    """Return the directory that holds ansible_collections/vmware/vmware_rest."""
+    namespace_dir = os.path.dirname(COLLECTION_DIR)
+    root = os.path.dirname(namespace_dir)
+    if os.path.basename(root) == "ansible_collections":
+        return os.path.dirname(root)
+    return os.environ.get("ANSIBLE_COLLECTIONS_PATH", "").split(os.pathsep)[0]
+
+
+def measure(module, args_file):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        i for i in [collections_path(), env.get("PYTHONPATH")] if i
+    )
+    # Like AnsiballZ, the module_utils are not compiled in advance
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    proc = subprocess.run(
+        [sys.executable, "-c", MEASURE, args_file, module],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    for line in proc.stderr.splitlines():
+        if line.startswith("STARTUP_TIME "):
+            return json.loads(line[len("STARTUP_TIME ") :])
+    raise RuntimeError("{} failed to start:\n{}".format(module, proc.stderr))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", help="default: a few common modules")
+    parser.add_argument("--all", action="store_true", help="measure all the modules")
+    parser.add_argument("--runs", type=int, default=5, help="runs per module")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        help="maximum median startup time of a module, in milliseconds",
+    )
+    args = parser.parse_args()
+
+    modules = args.modules or DEFAULT_MODULES
+    if args.all:
+        modules = sorted(
+            i[:-3]
+            for i in os.listdir(os.path.join(COLLECTION_DIR, "plugins", "modules"))
+            if i.endswith(".py") and i != "__init__.py"
+        )
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as args_file:
+        json.dump({"ANSIBLE_MODULE_ARGS": {}}, args_file)
+        args_file.flush()
+        print(
+            "{:<50} {}".format("module", " ".join("{:>8}".format(i) for i in PHASES))
+            + "    total"
+        )
+        slow = []
+        for module in modules:
+            runs = [measure(module, args_file.name) for _ in range(args.runs)]
+            median = {i: statistics.median(r[i] for r in runs) * 1000 for i in PHASES}
+            total = median["import"] + median["argspec"] + median["module"]
+            print(
+                "{:<50} {} {:>8.1f}".format(
+                    module,
+                    " ".join("{:>8.1f}".format(median[i]) for i in PHASES),
+                    total,
+                )
+            )
+            if args.threshold and total > args.threshold:
+                slow.append(module)
+
+    if slow:
+        print(
+            "The startup time is above {}ms: {}".format(args.threshold, ", ".join(slow))
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()